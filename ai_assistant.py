@@ -3,19 +3,213 @@
 支持Claude API, Ollama, DeepSeek API
 用于期权数据分析和交易建议
 """
+import hashlib
+import itertools
 import json
-import requests
+import logging
+import httpx
+import numpy as np
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime
 import os
+import queue
+import random
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 动态部分模板（用户问题与数据），与上面的固定指令分开维护
+ANALYSIS_QUERY_TEMPLATE = """
+用户咨询: {user_query}
+"""
+
+CHAIN_SUMMARY_TEMPLATE = """
+以下是当前的期权数据:
+
+数据概览:
+- 总合约数: {total_contracts}
+- 可用到期日: {expiry_dates}
+- 执行价格范围: {strike_min:.0f} - {strike_max:.0f}
+- 期权类型: {option_types}
+
+样本合约详情:
+"""
+
+CONTRACT_TEMPLATE = """
+合约 {i}:
+- 代码: {symbol}
+- 类型: {option_type}
+- 执行价: ${strike_price:,.0f}
+- 到期日: {expiry}
+- 剩余天数: {days_to_expiry}天
+- 标记价格: ${mark_price:.4f}
+- 买卖价差: ${bid_price:.4f} - ${ask_price:.4f}
+- 隐含波动率: {iv:.1f}%
+- Delta: {delta:.4f}
+- 成交量: {volume_24h:.0f}
+- 持仓量: {open_interest:.0f}
+- 价内状态: {moneyness}
+"""
+
+# 样本合约实际用到的字段；数据指纹只取这些字段，其余字段变化不影响格式化结果
+CHAIN_BLOCK_FIELDS = (
+    'symbol', 'option_type', 'strike_price', 'expiry_date_formatted', 'days_to_expiry',
+    'mark_price', 'bid_price', 'ask_price', 'iv', 'delta',
+    'volume_24h', 'open_interest', 'in_the_money',
+)
+
+CHAT_CONTEXT_TEMPLATE = """
+用户消息: {user_message}
+
+当前期权搜索上下文:
+- 基础币种: {base_coin}
+- 期权方向: {direction}
+- 目标价格: ${target_price:,.0f}
+- 目标天数: {days}天
+
+请基于这个上下文回答用户的问题。
+"""
+
+# 分析结果中触发交易任务的关键词 -> 任务类别
+TASK_TRIGGER_WORDS = {
+    '买入': 'buy',
+    '购买': 'buy',
+    '卖出': 'sell',
+    '监控': 'monitor',
+    '观察': 'monitor'
+}
+
+def _build_trigger_matcher():
+    """构建一次性扫描所有关键词的匹配器（优先Aho-Corasick自动机，否则退化为正则交替）"""
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for word, tag in TASK_TRIGGER_WORDS.items():
+            automaton.add_word(word, tag)
+        automaton.make_automaton()
+        return lambda text: {tag for _, tag in automaton.iter(text)}
+    
+    pattern = re.compile('|'.join(map(re.escape, TASK_TRIGGER_WORDS)))
+    return lambda text: {TASK_TRIGGER_WORDS[m] for m in pattern.findall(text)}
+
+_match_task_triggers = _build_trigger_matcher()
+
+def _loads(raw: bytes) -> Any:
+    """解析JSON响应体（优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# 瞬时错误重试: 最多3次，指数退避(0.5s起，上限8s)+全抖动，优先遵循Retry-After
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+# 仅重试请求尚未发出的连接阶段错误；读超时等发生在POST已发送之后，重试会重复计费。
+# RemoteProtocolError无法区分发送前后，不重试
+RETRY_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """计算第attempt次重试前的等待秒数"""
+    if response is not None:
+        retry_after = response.headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+# Claude缓存前缀的最小长度（Sonnet为1024 token，按约2字符/token粗略折算）；
+# system提示词加期权数据块不足此长度时不设缓存断点
+PROMPT_CACHE_MIN_CHARS = 2048
+
+# 精确匹配响应缓存最多保留的条目数（LRU淘汰）
+RESPONSE_CACHE_MAX = 256
+
+# 语义缓存使用的多语言MiniLM模型（384维，支持中文）
+SEMANTIC_MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+SEMANTIC_DIM = 384
+# 语义缓存最多保留的回答数；写满时丢弃过期及较旧的一半并重建索引
+SEMANTIC_CACHE_MAX = 1024
+
+# 期权分析的固定指令部分，作为system提示词发送
+ANALYSIS_SYSTEM_PROMPT = """你是一位专业的期权交易分析师。用户会给出咨询问题以及当前的期权数据。
+
+请基于用户提供的数据，提供专业的期权分析和建议。请包括:
+
+1. 市场概况分析
+2. 推荐的期权合约（说明理由）
+3. 风险评估
+4. 具体的交易建议（包括进入点、止损点、目标利润）
+5. 市场时机分析
+
+请用简洁明了的中文回答，重点突出实用的交易建议。
+"""
 
 class AIAssistant:
     """AI助手管理器"""
     
     def __init__(self):
         """初始化AI助手"""
-        self.conversation_history = []
+        # 内存中只保留最近的对话，溢出的旧记录可选写入SQLite（设置 AI_HISTORY_DB）
+        self.history_max = int(os.getenv('AI_HISTORY_MAX', '200'))
+        self.conversation_history = deque(maxlen=self.history_max)
+        self._history_db_path = os.getenv('AI_HISTORY_DB')
+        self._history_queue: Optional[queue.Queue] = None
+        if self._history_db_path:
+            self._history_queue = queue.Queue()
+            threading.Thread(target=self._history_writer, daemon=True).start()
+        # 共享HTTP/2客户端：同一主机的并发请求复用一条连接（多路复用）
+        self._http = self._create_http_client()
+        # 精确匹配响应缓存（LRU）: key -> (写入时间, 结果)；缓存与命中统计的读写都在锁内进行
+        self._resp_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._cache_ttl = 1800
+        self._cache_stats = {'hits': 0, 'misses': 0}
+        self._cache_lock = threading.Lock()
+        # 请求头缓存: provider -> headers
+        self._headers_cache: Dict[str, Dict] = {}
+        # 期权数据块缓存（LRU，最多16份）: 数据指纹 -> 格式化文本
+        self._chain_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._chain_lock = threading.Lock()
+        # 同一份数据并发请求多个提供商时使用的线程池
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ai-call')
+        # 任务ID序号，与单调时钟组合保证同一秒内生成的任务也不会重复
+        self._task_seq = itertools.count()
+        # 语义缓存: 同义改写的问题复用已有回答（依赖可选，需 AI_SEMANTIC_CACHE=1 显式开启）
+        self._sem_enabled = SEMANTIC_CACHE_AVAILABLE and os.getenv('AI_SEMANTIC_CACHE', '0') == '1'
+        self._sem_threshold = 0.92
+        self._sem_model = None
+        self._sem_index = None
+        # 与索引行一一对应: (写入时间, 作用域, 用户消息, 结果, 向量)；索引与列表的读写都在锁内进行
+        self._sem_store: List[Tuple[float, str, str, Dict, Any]] = []
+        self._sem_lock = threading.Lock()
+        if self._sem_enabled:
+            # 模型在后台线程加载，加载完成前请求直接跳过语义缓存
+            threading.Thread(target=self._load_semantic_model, name='ai-semantic-load', daemon=True).start()
         self.api_configs = {
             'claude': {
                 'api_key': '',
@@ -36,13 +230,42 @@ def __init__(self):
             }
         }
         
+    @staticmethod
+    def _create_http_client() -> httpx.Client:
+        """创建支持HTTP/2与连接池的同步客户端（重试统一由 _post_with_retry 处理）"""
+        transport = httpx.HTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        )
+        return httpx.Client(transport=transport, timeout=30)
+    
     def update_api_config(self, provider: str, config: Dict):
         """更新API配置"""
         if provider in self.api_configs:
             self.api_configs[provider].update(config)
+            self._headers_cache.pop(provider, None)
             return True
         return False
     
+    def _provider_headers(self, provider: str) -> Dict:
+        """获取提供商请求头（按API Key缓存，配置更新时失效）"""
+        headers = self._headers_cache.get(provider)
+        if headers is None:
+            api_key = self.api_configs[provider]['api_key']
+            if provider == 'claude':
+                headers = {
+                    'Content-Type': 'application/json',
+                    'x-api-key': api_key,
+                    'anthropic-version': '2023-06-01'
+                }
+            else:
+                headers = {
+                    'Content-Type': 'application/json',
+                    'Authorization': f"Bearer {api_key}"
+                }
+            self._headers_cache[provider] = headers
+        return headers
+    
     def get_api_config(self, provider: str) -> Dict:
         """获取API配置"""
         return self.api_configs.get(provider, {})
@@ -68,11 +291,7 @@ def _test_claude_connection(self) -> Dict:
         if not config.get('api_key'):
             return {'success': False, 'message': '请设置Claude API Key'}
         
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': config['api_key'],
-            'anthropic-version': '2023-06-01'
-        }
+        headers = self._provider_headers('claude')
         
         data = {
             'model': config['model'],
@@ -81,7 +300,7 @@ def _test_claude_connection(self) -> Dict:
         }
         
         try:
-            response = requests.post(
+            response = self._http.post(
                 f"{config['base_url']}/v1/messages",
                 headers=headers,
                 json=data,
@@ -93,7 +312,7 @@ def _test_claude_connection(self) -> Dict:
             else:
                 return {'success': False, 'message': f'Claude API错误: {response.status_code}'}
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return {'success': False, 'message': f'Claude API连接失败: {str(e)}'}
     
     def _test_ollama_connection(self) -> Dict:
@@ -102,7 +321,7 @@ def _test_ollama_connection(self) -> Dict:
         
         try:
             # 测试Ollama服务是否运行
-            response = requests.get(f"{config['base_url']}/api/tags", timeout=5)
+            response = self._http.get(f"{config['base_url']}/api/tags", timeout=5)
             
             if response.status_code == 200:
                 models = response.json().get('models', [])
@@ -113,7 +332,7 @@ def _test_ollama_connection(self) -> Dict:
             else:
                 return {'success': False, 'message': 'Ollama服务未响应'}
                 
-        except requests.RequestException:
+        except httpx.HTTPError:
             return {'success': False, 'message': 'Ollama服务未启动或无法连接'}
     
     def _test_deepseek_connection(self) -> Dict:
@@ -122,10 +341,7 @@ def _test_deepseek_connection(self) -> Dict:
         if not config.get('api_key'):
             return {'success': False, 'message': '请设置DeepSeek API Key'}
         
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {config['api_key']}"
-        }
+        headers = self._provider_headers('deepseek')
         
         data = {
             'model': config['model'],
@@ -134,7 +350,7 @@ def _test_deepseek_connection(self) -> Dict:
         }
         
         try:
-            response = requests.post(
+            response = self._http.post(
                 f"{config['base_url']}/v1/chat/completions",
                 headers=headers,
                 json=data,
@@ -146,138 +362,251 @@ def _test_deepseek_connection(self) -> Dict:
             else:
                 return {'success': False, 'message': f'DeepSeek API错误: {response.status_code}'}
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return {'success': False, 'message': f'DeepSeek API连接失败: {str(e)}'}
     
     def analyze_options_data(self, provider: str, options_data: List[Dict], user_query: str) -> Dict:
         """分析期权数据"""
         try:
-            # 准备分析提示词
-            analysis_prompt = self._build_analysis_prompt(options_data, user_query)
+            # 准备分析提示词（固定指令 + 期权数据 + 用户问题）
+            system_prompt, chain_block, analysis_prompt = self._build_analysis_prompt(options_data, user_query)
+            
+            if provider not in self.api_configs:
+                return {'success': False, 'message': '不支持的AI服务提供商'}
+            
+            # 同一份期权数据下的同义问题直接复用回答
+            scope = self._semantic_scope(provider, chain_block)
+            embedding = self._semantic_embed(user_query)
+            cached = self._semantic_lookup(scope, embedding, provider, analysis_prompt)
+            if cached is not None:
+                return cached
             
             # 根据提供商调用相应的API
             if provider == 'claude':
-                return self._call_claude_api(analysis_prompt)
+                result = self._call_claude_api(analysis_prompt, system_prompt, cache_prefix=chain_block)
             elif provider == 'ollama':
-                return self._call_ollama_api(analysis_prompt)
-            elif provider == 'deepseek':
-                return self._call_deepseek_api(analysis_prompt)
+                result = self._call_ollama_api(analysis_prompt, system_prompt)
             else:
-                return {'success': False, 'message': '不支持的AI服务提供商'}
+                result = self._call_deepseek_api(analysis_prompt, system_prompt)
+            
+            return self._semantic_store_result(scope, embedding, user_query, result)
                 
         except Exception as e:
             return {'success': False, 'message': f'分析失败: {str(e)}'}
     
-    def _build_analysis_prompt(self, options_data: List[Dict], user_query: str) -> str:
-        """构建分析提示词"""
-        # 准备期权数据摘要
-        data_summary = {
-            'total_contracts': len(options_data),
-            'expiry_dates': list(set([opt.get('expiry_date_formatted', '') for opt in options_data])),
-            'strike_prices': list(set([opt.get('strike_price', 0) for opt in options_data])),
-            'option_types': list(set([opt.get('option_type', '') for opt in options_data]))
-        }
+    def _build_analysis_prompt(self, options_data: List[Dict], user_query: str) -> Tuple[str, str, str]:
+        """构建分析提示词，返回 (system提示词, 期权数据块, 用户内容)"""
+        chain_block = self._build_chain_block(options_data)
+        return self._static_system_prompt(), chain_block, self._dynamic_user_content(chain_block, user_query)
+    
+    def analyze_options_data_multi(self, providers: List[str], options_data: List[Dict], user_query: str) -> Dict[str, Dict]:
+        """同一份数据同时交给多个提供商分析，提示词只构建一次，各提供商请求并行发送"""
+        try:
+            system_prompt, chain_block, analysis_prompt = self._build_analysis_prompt(options_data, user_query)
+        except Exception as e:
+            return {provider: {'success': False, 'message': f'分析失败: {str(e)}'} for provider in providers}
         
-        # 选择前10个最相关的期权合约作为样本
-        sample_contracts = options_data[:10]
+        futures = {}
+        for provider in providers:
+            if provider not in self.api_configs:
+                continue
+            call = getattr(self, f'_call_{provider}_api')
+            kwargs = {'cache_prefix': chain_block} if provider == 'claude' else {}
+            futures[provider] = self._pool.submit(call, analysis_prompt, system_prompt, **kwargs)
         
-        prompt = f"""
-你是一位专业的期权交易分析师。用户咨询: {user_query}
-
-以下是当前的期权数据:
-
-数据概览:
-- 总合约数: {data_summary['total_contracts']}
-- 可用到期日: {', '.join(data_summary['expiry_dates'][:5])}
-- 执行价格范围: {min(data_summary['strike_prices']):.0f} - {max(data_summary['strike_prices']):.0f}
-- 期权类型: {', '.join(data_summary['option_types'])}
-
-样本合约详情:
-"""
+        results = {}
+        for provider in providers:
+            future = futures.get(provider)
+            if future is None:
+                results[provider] = {'success': False, 'message': '不支持的AI服务提供商'}
+                continue
+            try:
+                results[provider] = future.result()
+            except Exception as e:
+                results[provider] = {'success': False, 'message': f'分析失败: {str(e)}'}
         
-        for i, contract in enumerate(sample_contracts, 1):
-            prompt += f"""
-合约 {i}:
-- 代码: {contract.get('symbol', '')}
-- 类型: {contract.get('option_type', '')}
-- 执行价: ${contract.get('strike_price', 0):,.0f}
-- 到期日: {contract.get('expiry_date_formatted', '')}
-- 剩余天数: {contract.get('days_to_expiry', 0)}天
-- 标记价格: ${contract.get('mark_price', 0):.4f}
-- 买卖价差: ${contract.get('bid_price', 0):.4f} - ${contract.get('ask_price', 0):.4f}
-- 隐含波动率: {contract.get('iv', 0):.1f}%
-- Delta: {contract.get('delta', 0):.4f}
-- 成交量: {contract.get('volume_24h', 0):.0f}
-- 持仓量: {contract.get('open_interest', 0):.0f}
-- 价内状态: {'价内' if contract.get('in_the_money', False) else '价外'}
-"""
+        return results
+    
+    def _static_system_prompt(self) -> str:
+        """分析师角色与回答要求（每次请求都相同）"""
+        return ANALYSIS_SYSTEM_PROMPT
+    
+    @staticmethod
+    def _select_sample_contracts(options_data: List[Dict], k: int = 10) -> Tuple[List[Dict], float, float]:
+        """向量化计算执行价范围，并按成交量+持仓量选出流动性最好的k个合约（保持原有顺序）"""
+        n = len(options_data)
+        if n == 0:
+            return [], 0, 0
         
-        prompt += """
-
-请基于以上数据，提供专业的期权分析和建议。请包括:
-
-1. 市场概况分析
-2. 推荐的期权合约（说明理由）
-3. 风险评估
-4. 具体的交易建议（包括进入点、止损点、目标利润）
-5. 市场时机分析
-
-请用简洁明了的中文回答，重点突出实用的交易建议。
-"""
+        columns = np.fromiter(
+            (
+                (opt.get('strike_price') or 0, opt.get('volume_24h') or 0, opt.get('open_interest') or 0)
+                for opt in options_data
+            ),
+            dtype=[('strike', 'f8'), ('volume', 'f8'), ('oi', 'f8')],
+            count=n
+        )
+        strike_min = float(columns['strike'].min())
+        strike_max = float(columns['strike'].max())
+        
+        if n <= k:
+            return list(options_data), strike_min, strike_max
         
-        return prompt
+        liquidity = columns['volume'] + columns['oi']
+        top = np.sort(np.argpartition(-liquidity, k - 1)[:k])
+        return [options_data[i] for i in top], strike_min, strike_max
     
-    def _call_claude_api(self, prompt: str) -> Dict:
-        """调用Claude API"""
+    def _dynamic_user_content(self, chain_block: str, user_query: str) -> str:
+        """用户内容：期权数据块在前、用户问题在后，同一份数据的追问共享相同前缀"""
+        return chain_block + ANALYSIS_QUERY_TEMPLATE.format(user_query=user_query)
+    
+    def _chain_inputs(self, options_data: List[Dict]) -> Tuple[Tuple, List[Dict]]:
+        """数据块实际用到的内容：(数据概览, 样本合约)"""
+        # 到期日只需前5个（按出现顺序），数值列交给NumPy
+        expiries: Dict[str, None] = {}
+        types: Dict[str, None] = {}
+        for opt in options_data:
+            if len(expiries) < 5:
+                expiries.setdefault(opt.get('expiry_date_formatted', ''), None)
+            types.setdefault(opt.get('option_type', ''), None)
+            if len(expiries) == 5 and len(types) >= 2:
+                break
+        
+        sample_contracts, strike_min, strike_max = self._select_sample_contracts(options_data)
+        summary = (len(options_data), tuple(expiries), strike_min, strike_max, tuple(types))
+        return summary, sample_contracts
+    
+    @staticmethod
+    def _chain_key(summary: Tuple, sample_contracts: List[Dict]) -> str:
+        """数据块指纹：只取概览与样本合约的所需字段，不必序列化整份数据"""
+        rows = [tuple(contract.get(field) for field in CHAIN_BLOCK_FIELDS) for contract in sample_contracts]
+        return hashlib.blake2b(repr((summary, rows)).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _build_chain_block(self, options_data: List[Dict]) -> str:
+        """期权数据摘要与样本合约部分；同一份数据只格式化一次，追问时直接复用"""
+        summary, sample_contracts = self._chain_inputs(options_data)
+        key = self._chain_key(summary, sample_contracts)
+        with self._chain_lock:
+            block = self._chain_cache.get(key)
+            if block is not None:
+                self._chain_cache.move_to_end(key)
+                return block
+        
+        block = self._render_chain_block(summary, sample_contracts)
+        with self._chain_lock:
+            self._chain_cache[key] = block
+            if len(self._chain_cache) > 16:
+                self._chain_cache.popitem(last=False)
+        return block
+    
+    @staticmethod
+    def _render_chain_block(summary: Tuple, sample_contracts: List[Dict]) -> str:
+        """格式化期权数据摘要与样本合约"""
+        total_contracts, expiry_dates, strike_min, strike_max, option_types = summary
+        parts = [CHAIN_SUMMARY_TEMPLATE.format(
+            total_contracts=total_contracts,
+            expiry_dates=', '.join(expiry_dates),
+            strike_min=strike_min,
+            strike_max=strike_max,
+            option_types=', '.join(option_types)
+        )]
+        
+        for i, contract in enumerate(sample_contracts, 1):
+            parts.append(CONTRACT_TEMPLATE.format(
+                i=i,
+                symbol=contract.get('symbol', ''),
+                option_type=contract.get('option_type', ''),
+                strike_price=contract.get('strike_price', 0),
+                expiry=contract.get('expiry_date_formatted', ''),
+                days_to_expiry=contract.get('days_to_expiry', 0),
+                mark_price=contract.get('mark_price', 0),
+                bid_price=contract.get('bid_price', 0),
+                ask_price=contract.get('ask_price', 0),
+                iv=contract.get('iv', 0),
+                delta=contract.get('delta', 0),
+                volume_24h=contract.get('volume_24h', 0),
+                open_interest=contract.get('open_interest', 0),
+                moneyness='价内' if contract.get('in_the_money', False) else '价外'
+            ))
+        
+        return ''.join(parts)
+    
+    def _build_claude_request(self, prompt: str, system: Optional[str] = None,
+                              cache_prefix: Optional[str] = None):
+        """构建Claude API请求 (url, headers, data, timeout)
+        
+        cache_prefix 为 prompt 的开头部分（期权数据块）时，在其结尾设置缓存断点，
+        同一份数据的追问只需处理后面的问题部分。
+        """
         config = self.api_configs['claude']
         
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': config['api_key'],
-            'anthropic-version': '2023-06-01'
-        }
+        headers = self._provider_headers('claude')
+        
+        content = prompt
+        if (cache_prefix and prompt.startswith(cache_prefix)
+                and len(system or '') + len(cache_prefix) >= PROMPT_CACHE_MIN_CHARS):
+            content = [
+                {'type': 'text', 'text': cache_prefix, 'cache_control': {'type': 'ephemeral'}},
+                {'type': 'text', 'text': prompt[len(cache_prefix):]}
+            ]
         
         data = {
             'model': config['model'],
             'max_tokens': config['max_tokens'],
-            'messages': [{'role': 'user', 'content': prompt}]
+            'messages': [{'role': 'user', 'content': content}]
         }
+        if system:
+            # 固定指令单独作为system提示词（较短，单独不足以设置缓存断点）
+            data['system'] = system
         
-        try:
-            response = requests.post(
-                f"{config['base_url']}/v1/messages",
-                headers=headers,
-                json=data,
-                timeout=30
+        return f"{config['base_url']}/v1/messages", headers, data, 30
+    
+    def _handle_claude_response(self, response, prompt: str) -> Dict:
+        """处理Claude API响应"""
+        config = self.api_configs['claude']
+        
+        if response.status_code == 200:
+            result = _loads(response.content)
+            content = result['content'][0]['text']
+            usage = result.get('usage', {})
+            logger.debug(
+                "Claude usage: input=%s cache_read=%s cache_creation=%s",
+                usage.get('input_tokens'),
+                usage.get('cache_read_input_tokens'),
+                usage.get('cache_creation_input_tokens')
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['content'][0]['text']
-                
-                # 添加到对话历史
-                self.conversation_history.append({
-                    'timestamp': datetime.now().isoformat(),
-                    'provider': 'claude',
-                    'user_input': prompt,
-                    'ai_response': content
-                })
-                
-                return {
-                    'success': True,
-                    'response': content,
-                    'provider': 'claude',
-                    'model': config['model']
-                }
-            else:
-                error_msg = response.json().get('error', {}).get('message', '未知错误')
-                return {'success': False, 'message': f'Claude API错误: {error_msg}'}
+            # 添加到对话历史
+            self._append_history('claude', prompt, content)
+            
+            return {
+                'success': True,
+                'response': content,
+                'provider': 'claude',
+                'model': config['model']
+            }
+        else:
+            return {'success': False, 'message': f'Claude API错误: {self._error_message(response)}'}
+    
+    def _call_claude_api(self, prompt: str, system: Optional[str] = None,
+                         cache_prefix: Optional[str] = None) -> Dict:
+        """调用Claude API"""
+        cache_key = self._cache_key('claude', prompt, system)
+        cached = self._cache_lookup(cache_key, 'claude', prompt)
+        if cached is not None:
+            return cached
+        
+        url, headers, data, timeout = self._build_claude_request(prompt, system, cache_prefix)
+        
+        try:
+            response = self._post_with_retry(url, headers=headers, json=data, timeout=timeout)
+            return self._cache_store(cache_key, self._handle_claude_response(response, prompt))
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return {'success': False, 'message': f'Claude API调用失败: {str(e)}'}
     
-    def _call_ollama_api(self, prompt: str) -> Dict:
-        """调用Ollama API"""
+    def _build_ollama_request(self, prompt: str, system: Optional[str] = None):
+        """构建Ollama API请求 (url, headers, data, timeout)"""
         config = self.api_configs['ollama']
         
         data = {
@@ -288,135 +617,428 @@ def _call_ollama_api(self, prompt: str) -> Dict:
                 'temperature': config.get('temperature', 0.7)
             }
         }
+        if system:
+            data['system'] = system
         
-        try:
-            response = requests.post(
-                f"{config['base_url']}/api/generate",
-                json=data,
-                timeout=60
-            )
+        return f"{config['base_url']}/api/generate", None, data, 60
+    
+    def _handle_ollama_response(self, response, prompt: str) -> Dict:
+        """处理Ollama API响应"""
+        config = self.api_configs['ollama']
+        
+        if response.status_code == 200:
+            result = _loads(response.content)
+            content = result.get('response', '')
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result.get('response', '')
-                
-                # 添加到对话历史
-                self.conversation_history.append({
-                    'timestamp': datetime.now().isoformat(),
-                    'provider': 'ollama',
-                    'user_input': prompt,
-                    'ai_response': content
-                })
-                
-                return {
-                    'success': True,
-                    'response': content,
-                    'provider': 'ollama',
-                    'model': config['model']
-                }
-            else:
-                return {'success': False, 'message': f'Ollama API错误: {response.status_code}'}
+            # 添加到对话历史
+            self._append_history('ollama', prompt, content)
+            
+            return {
+                'success': True,
+                'response': content,
+                'provider': 'ollama',
+                'model': config['model']
+            }
+        else:
+            return {'success': False, 'message': f'Ollama API错误: {response.status_code}'}
+    
+    def _call_ollama_api(self, prompt: str, system: Optional[str] = None) -> Dict:
+        """调用Ollama API"""
+        cache_key = self._cache_key('ollama', prompt, system)
+        cached = self._cache_lookup(cache_key, 'ollama', prompt)
+        if cached is not None:
+            return cached
+        
+        url, headers, data, timeout = self._build_ollama_request(prompt, system)
+        
+        try:
+            response = self._post_with_retry(url, headers=headers, json=data, timeout=timeout)
+            return self._cache_store(cache_key, self._handle_ollama_response(response, prompt))
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return {'success': False, 'message': f'Ollama API调用失败: {str(e)}'}
     
-    def _call_deepseek_api(self, prompt: str) -> Dict:
-        """调用DeepSeek API"""
+    def _build_deepseek_request(self, prompt: str, system: Optional[str] = None):
+        """构建DeepSeek API请求 (url, headers, data, timeout)"""
         config = self.api_configs['deepseek']
         
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {config['api_key']}"
-        }
+        headers = self._provider_headers('deepseek')
+        
+        messages = [{'role': 'user', 'content': prompt}]
+        if system:
+            messages.insert(0, {'role': 'system', 'content': system})
         
         data = {
             'model': config['model'],
-            'messages': [{'role': 'user', 'content': prompt}],
+            'messages': messages,
             'max_tokens': config['max_tokens'],
             'temperature': 0.7
         }
         
-        try:
-            response = requests.post(
-                f"{config['base_url']}/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+        return f"{config['base_url']}/v1/chat/completions", headers, data, 30
+    
+    def _handle_deepseek_response(self, response, prompt: str) -> Dict:
+        """处理DeepSeek API响应"""
+        config = self.api_configs['deepseek']
+        
+        if response.status_code == 200:
+            result = _loads(response.content)
+            content = result['choices'][0]['message']['content']
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                
-                # 添加到对话历史
-                self.conversation_history.append({
-                    'timestamp': datetime.now().isoformat(),
-                    'provider': 'deepseek',
-                    'user_input': prompt,
-                    'ai_response': content
-                })
-                
-                return {
-                    'success': True,
-                    'response': content,
-                    'provider': 'deepseek',
-                    'model': config['model']
-                }
-            else:
-                error_msg = response.json().get('error', {}).get('message', '未知错误')
-                return {'success': False, 'message': f'DeepSeek API错误: {error_msg}'}
+            # 添加到对话历史
+            self._append_history('deepseek', prompt, content)
+            
+            return {
+                'success': True,
+                'response': content,
+                'provider': 'deepseek',
+                'model': config['model']
+            }
+        else:
+            return {'success': False, 'message': f'DeepSeek API错误: {self._error_message(response)}'}
+    
+    def _call_deepseek_api(self, prompt: str, system: Optional[str] = None) -> Dict:
+        """调用DeepSeek API"""
+        cache_key = self._cache_key('deepseek', prompt, system)
+        cached = self._cache_lookup(cache_key, 'deepseek', prompt)
+        if cached is not None:
+            return cached
+        
+        url, headers, data, timeout = self._build_deepseek_request(prompt, system)
+        
+        try:
+            response = self._post_with_retry(url, headers=headers, json=data, timeout=timeout)
+            return self._cache_store(cache_key, self._handle_deepseek_response(response, prompt))
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return {'success': False, 'message': f'DeepSeek API调用失败: {str(e)}'}
     
+    def _post_with_retry(self, url: str, **kwargs) -> httpx.Response:
+        """POST请求，遇到429/5xx或连接失败时退避重试"""
+        for attempt in range(RETRY_MAX_ATTEMPTS + 1):
+            try:
+                response = self._http.post(url, **kwargs)
+            except RETRY_TRANSPORT_ERRORS:
+                if attempt == RETRY_MAX_ATTEMPTS:
+                    raise
+                time.sleep(_retry_delay(attempt))
+                continue
+            
+            if response.status_code not in RETRY_STATUS_CODES or attempt == RETRY_MAX_ATTEMPTS:
+                return response
+            time.sleep(_retry_delay(attempt, response))
+    
+    @staticmethod
+    def _error_message(response) -> str:
+        """提取错误信息；非JSON错误页（如网关5xx）回退为状态码和正文片段"""
+        try:
+            error = _loads(response.content).get('error', {})
+            if isinstance(error, dict):
+                return error.get('message', '未知错误')
+            return str(error) or '未知错误'
+        except (ValueError, AttributeError):
+            return f"HTTP {response.status_code}: {response.text[:200]}"
+    
+    def _append_history(self, provider: str, prompt: str, content: str):
+        """记录一轮对话"""
+        if self._history_queue is not None and len(self.conversation_history) == self.history_max:
+            # 即将被挤出的最旧记录交给后台线程落盘
+            self._history_queue.put(self.conversation_history[0])
+        
+        self.conversation_history.append({
+            'timestamp': datetime.now().isoformat(),
+            'provider': provider,
+            'user_input': prompt,
+            'ai_response': content
+        })
+    
+    def _history_writer(self):
+        """后台线程：把溢出的对话记录追加写入SQLite"""
+        try:
+            conn = sqlite3.connect(self._history_db_path)
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS conversation_history ('
+                'timestamp TEXT, provider TEXT, user_input TEXT, ai_response TEXT)'
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"打开对话历史数据库失败: {e}")
+            self._history_queue = None
+            return
+        
+        while True:
+            record = self._history_queue.get()
+            try:
+                conn.execute(
+                    'INSERT INTO conversation_history VALUES (?, ?, ?, ?)',
+                    (record['timestamp'], record['provider'], record['user_input'], record['ai_response'])
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"写入对话历史失败: {e}")
+    
+    def _cache_key(self, provider: str, prompt: str, system: Optional[str] = None) -> str:
+        """计算响应缓存键（提供商、模型、max_tokens与提示词共同决定）"""
+        config = self.api_configs[provider]
+        raw = f"{provider}|{config.get('model')}|{config.get('max_tokens')}|{system or ''}|{prompt}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _cache_lookup(self, key: str, provider: str, prompt: str) -> Optional[Dict]:
+        """查找未过期的缓存响应，命中时同样记入对话历史"""
+        result = None
+        with self._cache_lock:
+            entry = self._resp_cache.get(key)
+            if entry is not None:
+                stored_at, cached = entry
+                if time.time() - stored_at <= self._cache_ttl:
+                    self._resp_cache.move_to_end(key)
+                    result = cached
+                else:
+                    del self._resp_cache[key]
+            self._cache_stats['hits' if result is not None else 'misses'] += 1
+        
+        if result is None:
+            return None
+        self._append_history(provider, prompt, result['response'])
+        return dict(result)
+    
+    def _cache_store(self, key: str, result: Dict) -> Dict:
+        """缓存成功的响应（失败结果不缓存）；写入时清理过期条目，超出上限淘汰最久未用的"""
+        if result.get('success'):
+            now = time.time()
+            with self._cache_lock:
+                self._resp_cache[key] = (now, dict(result))
+                self._resp_cache.move_to_end(key)
+                expired = [k for k, (stored_at, _) in self._resp_cache.items()
+                           if now - stored_at > self._cache_ttl]
+                for k in expired:
+                    del self._resp_cache[k]
+                while len(self._resp_cache) > RESPONSE_CACHE_MAX:
+                    self._resp_cache.popitem(last=False)
+        return result
+    
+    def clear_response_cache(self):
+        """清除响应缓存"""
+        with self._cache_lock:
+            self._resp_cache.clear()
+            self._cache_stats = {'hits': 0, 'misses': 0}
+        with self._sem_lock:
+            if self._sem_index is not None:
+                self._sem_index.reset()
+            self._sem_store.clear()
+    
+    def get_response_cache_stats(self) -> Dict:
+        """获取响应缓存统计"""
+        with self._cache_lock:
+            return {
+                'size': len(self._resp_cache),
+                'semantic_size': len(self._sem_store),
+                'ttl': self._cache_ttl,
+                **self._cache_stats
+            }
+    
+    def _semantic_scope(self, provider: str, context_key: str) -> str:
+        """语义缓存作用域：只有提供商、模型和上下文都一致时才允许复用"""
+        config = self.api_configs[provider]
+        raw = f"{provider}|{config.get('model')}|{context_key}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _load_semantic_model(self):
+        """后台线程：加载向量模型并创建索引"""
+        try:
+            model = SentenceTransformer(SEMANTIC_MODEL_NAME)
+            with self._sem_lock:
+                self._sem_index = faiss.IndexFlatIP(SEMANTIC_DIM)
+                self._sem_model = model
+        except Exception as e:
+            logger.warning(f"语义缓存不可用，已关闭: {e}")
+            self._sem_enabled = False
+    
+    def _semantic_embed(self, text: str):
+        """计算归一化向量，语义缓存不可用或模型尚未加载完成时返回None"""
+        model = self._sem_model
+        if not self._sem_enabled or model is None:
+            return None
+        
+        try:
+            vector = model.encode([text], normalize_embeddings=True)
+            return np.asarray(vector, dtype='float32')
+        except Exception as e:
+            logger.warning(f"语义缓存不可用，已关闭: {e}")
+            self._sem_enabled = False
+            return None
+    
+    def _semantic_lookup(self, scope: str, embedding, provider: str, prompt: str) -> Optional[Dict]:
+        """查找相似度超过阈值且作用域一致的已缓存回答"""
+        if embedding is None:
+            return None
+        
+        now = time.time()
+        with self._sem_lock:
+            if self._sem_index is None or self._sem_index.ntotal == 0:
+                return None
+            k = min(8, self._sem_index.ntotal)
+            scores, ids = self._sem_index.search(embedding, k)
+            result = None
+            for score, idx in zip(scores[0], ids[0]):
+                if idx < 0 or score <= self._sem_threshold:
+                    break
+                stored_at, entry_scope, _, entry_result, _ = self._sem_store[idx]
+                # 与精确匹配缓存使用同一有效期，过期的回答不再复用
+                if entry_scope == scope and now - stored_at <= self._cache_ttl:
+                    result = entry_result
+                    break
+        
+        if result is None:
+            return None
+        with self._cache_lock:
+            self._cache_stats['hits'] += 1
+        self._append_history(provider, prompt, result['response'])
+        return dict(result)
+    
+    def _semantic_store_result(self, scope: str, embedding, user_message: str, result: Dict) -> Dict:
+        """将成功的回答加入语义索引"""
+        if embedding is not None and result.get('success'):
+            now = time.time()
+            with self._sem_lock:
+                if len(self._sem_store) >= SEMANTIC_CACHE_MAX:
+                    self._compact_semantic_store(now)
+                self._sem_index.add(embedding)
+                self._sem_store.append((now, scope, user_message, dict(result), embedding))
+        return result
+    
+    def _compact_semantic_store(self, now: float):
+        """语义缓存写满时只保留未过期的较新一半回答并重建索引（调用方需持有 _sem_lock）"""
+        kept = [entry for entry in self._sem_store if now - entry[0] <= self._cache_ttl]
+        kept = kept[-(SEMANTIC_CACHE_MAX // 2):]
+        self._sem_index.reset()
+        if kept:
+            self._sem_index.add(np.vstack([entry[4] for entry in kept]))
+        self._sem_store = kept
+    
     def chat(self, provider: str, user_message: str, context: Dict = None) -> Dict:
         """简单对话功能"""
         try:
-            # 如果有上下文信息，添加到消息中
-            if context:
-                enhanced_message = f"""
-用户消息: {user_message}
-
-当前期权搜索上下文:
-- 基础币种: {context.get('base_coin', 'BTC')}
-- 期权方向: {context.get('direction', 'Call')}
-- 目标价格: ${context.get('target_price', 0):,.0f}
-- 目标天数: {context.get('days', 0)}天
-
-请基于这个上下文回答用户的问题。
-"""
-            else:
-                enhanced_message = user_message
+            enhanced_message = self._build_chat_message(user_message, context)
+            
+            if provider not in self.api_configs:
+                return {'success': False, 'message': '不支持的AI服务提供商'}
+            
+            # 上下文相同时，同义改写的问题直接复用回答
+            scope = self._semantic_scope(provider, json.dumps(context or {}, sort_keys=True, default=str))
+            embedding = self._semantic_embed(user_message)
+            cached = self._semantic_lookup(scope, embedding, provider, enhanced_message)
+            if cached is not None:
+                return cached
             
             # 根据提供商调用相应的API
             if provider == 'claude':
-                return self._call_claude_api(enhanced_message)
+                result = self._call_claude_api(enhanced_message)
             elif provider == 'ollama':
-                return self._call_ollama_api(enhanced_message)
-            elif provider == 'deepseek':
-                return self._call_deepseek_api(enhanced_message)
+                result = self._call_ollama_api(enhanced_message)
             else:
-                return {'success': False, 'message': '不支持的AI服务提供商'}
+                result = self._call_deepseek_api(enhanced_message)
+            
+            return self._semantic_store_result(scope, embedding, user_message, result)
                 
         except Exception as e:
             return {'success': False, 'message': f'对话失败: {str(e)}'}
     
+    def _build_chat_message(self, user_message: str, context: Dict = None) -> str:
+        """构建对话消息（有上下文时附加期权搜索条件）"""
+        if context:
+            return CHAT_CONTEXT_TEMPLATE.format(
+                user_message=user_message,
+                base_coin=context.get('base_coin', 'BTC'),
+                direction=context.get('direction', 'Call'),
+                target_price=context.get('target_price', 0),
+                days=context.get('days', 0)
+            )
+        return user_message
+    
+    def chat_stream(self, provider: str, user_message: str, context: Dict = None) -> Iterator[str]:
+        """流式对话，逐段返回生成的文本"""
+        return self.stream(provider, self._build_chat_message(user_message, context))
+    
+    def _build_stream_request(self, provider: str, prompt: str, system: Optional[str] = None):
+        """构建开启流式输出的请求"""
+        build = getattr(self, f'_build_{provider}_request', None)
+        if build is None:
+            raise ValueError('不支持的AI服务提供商')
+        
+        url, headers, data, timeout = build(prompt, system)
+        data['stream'] = True
+        return url, headers, data, timeout
+    
+    @staticmethod
+    def _extract_stream_text(provider: str, line: str) -> Optional[str]:
+        """从一行流式输出中提取文本增量（Claude/DeepSeek为SSE，Ollama为NDJSON）"""
+        if not line:
+            return None
+        
+        if provider == 'ollama':
+            return _loads(line).get('response') or None
+        
+        if not line.startswith('data:'):
+            return None
+        payload = line[5:].strip()
+        if not payload or payload == '[DONE]':
+            return None
+        
+        event = _loads(payload)
+        if provider == 'claude':
+            if event.get('type') == 'content_block_delta':
+                return event.get('delta', {}).get('text') or None
+            return None
+        
+        choices = event.get('choices') or [{}]
+        return choices[0].get('delta', {}).get('content') or None
+    
+    def _stream_error(self, provider: str, response) -> RuntimeError:
+        """构造流式请求失败时的异常"""
+        if provider == 'ollama':
+            return RuntimeError(f'Ollama API错误: {response.status_code}')
+        name = 'Claude' if provider == 'claude' else 'DeepSeek'
+        return RuntimeError(f'{name} API错误: {self._error_message(response)}')
+    
+    def stream(self, provider: str, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        """同步流式调用，首个token到达即可返回给调用方"""
+        url, headers, data, timeout = self._build_stream_request(provider, prompt, system)
+        chunks = []
+        
+        with self._http.stream('POST', url, headers=headers, json=data, timeout=timeout) as response:
+            if response.status_code != 200:
+                response.read()
+                raise self._stream_error(provider, response)
+            
+            for line in response.iter_lines():
+                text = self._extract_stream_text(provider, line)
+                if text:
+                    chunks.append(text)
+                    yield text
+        
+        self._append_history(provider, prompt, ''.join(chunks))
+    
     def get_conversation_history(self) -> List[Dict]:
-        """获取对话历史"""
-        return self.conversation_history
+        """获取对话历史（内存中最近的记录）"""
+        return list(self.conversation_history)
     
     def clear_conversation_history(self):
         """清除对话历史"""
-        self.conversation_history = []
+        self.conversation_history.clear()
     
     def generate_trading_tasks(self, analysis_result: str, user_preferences: Dict = None) -> List[Dict]:
         """根据分析结果生成交易任务清单"""
         tasks = []
         
         # 基于AI分析结果提取任务（这里是简化版本，实际可以用NLP进一步解析）
-        if '买入' in analysis_result or '购买' in analysis_result:
+        # 单次扫描得到所有命中的任务类别
+        hits = _match_task_triggers(analysis_result) if analysis_result else set()
+        id_root = f"task_{time.monotonic_ns()}"
+        
+        if 'buy' in hits:
             tasks.append({
-                'id': f"task_{int(time.time())}",
+                'id': f"{id_root}_{next(self._task_seq)}",
                 'type': 'buy_option',
                 'title': '买入推荐期权',
                 'description': '根据AI分析买入推荐的期权合约',
@@ -425,9 +1047,9 @@ def generate_trading_tasks(self, analysis_result: str, user_preferences: Dict =
                 'created_at': datetime.now().isoformat()
             })
         
-        if '卖出' in analysis_result:
+        if 'sell' in hits:
             tasks.append({
-                'id': f"task_{int(time.time())}_1",
+                'id': f"{id_root}_{next(self._task_seq)}",
                 'type': 'sell_option',
                 'title': '卖出期权',
                 'description': '根据AI分析卖出指定期权合约',
@@ -436,9 +1058,9 @@ def generate_trading_tasks(self, analysis_result: str, user_preferences: Dict =
                 'created_at': datetime.now().isoformat()
             })
         
-        if '监控' in analysis_result or '观察' in analysis_result:
+        if 'monitor' in hits:
             tasks.append({
-                'id': f"task_{int(time.time())}_2",
+                'id': f"{id_root}_{next(self._task_seq)}",
                 'type': 'monitor',
                 'title': '市场监控',
                 'description': '监控推荐期权的价格变化',
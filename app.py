@@ -2,13 +2,18 @@
 """
 Bybit期权链搜索Web应用
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from flask.json.provider import JSONProvider
 from datetime import datetime, timedelta
 import json
+import logging
+import os
+import time
+import decimal
+import orjson
 from bybit_api import BybitAPI
-from option_chain import OptionChain
 from config import Config
-from data_cache import data_cache
+from data_cache import SUPPORTED_COINS, data_cache, normalize_coins
 from ai_assistant import ai_assistant
 from trading import OptionTrader
 from strategy_manager import strategy_service
@@ -18,14 +23,75 @@
 from settings_manager.manager import AppSettings
 from settings_manager.api import bp as settings_bp
 from watchlist_manager import watchlist_manager
+from option_filter_kernel import filter_options
 from threading import Lock
-from typing import Optional, Dict, List
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+import numpy as np
+
+# 默认只输出WARNING及以上，DEBUG/INFO日志不会被格式化
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def _orjson_default(obj):
+    """orjson不支持的类型转换（与Flask默认JSON行为保持一致）"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """使用orjson编解码的JSON提供器，jsonify及request.get_json均走C实现"""
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default, option=self.option),
+            mimetype='application/json'
+        )
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# 一天的毫秒数（到期时间戳均为毫秒）
+DAY_MS = 86_400_000
+
+# 现货价格缓存有效期（毫秒），以及拉取失败时使用的参考价格
+SPOT_PRICE_TTL_MS = 2000
+FALLBACK_SPOT_PRICES = {'BTC': 98000, 'ETH': 3500}
+# base_coin -> (价格, 过期时间毫秒)
+_PRICE_CACHE: Dict[str, Tuple[float, int]] = {}
 
 current_settings: AppSettings = settings_manager.get_settings()
 
 
+@lru_cache(maxsize=1)
+def get_api_client() -> BybitAPI:
+    """按当前设置惰性创建API客户端（首次请求时才构造，导入与fork均无需付出开销）"""
+    return BybitAPI(
+        api_key=current_settings.api_key,
+        api_secret=current_settings.api_secret,
+        base_url=Config.BYBIT_BASE_URL,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_strategy_trader() -> OptionTrader:
+    """惰性创建策略下单器"""
+    return OptionTrader(get_api_client())
+
+
 def apply_runtime_settings(settings: AppSettings) -> None:
     """Apply runtime API credentials and external service configuration."""
     base_url = 'https://api-testnet.bybit.com' if settings.is_testnet else 'https://api.bybit.com'
@@ -37,19 +103,17 @@ def apply_runtime_settings(settings: AppSettings) -> None:
     Config.PRICE_MONITOR_BASE = settings.price_monitor_base
     Config.STRATEGY_WEBHOOK_BASE = settings.strategy_webhook_base
 
-    global api_client, option_chain, strategy_trader, current_settings
+    global current_settings
     current_settings = settings
 
-    api_client = BybitAPI(
-        api_key=settings.api_key,
-        api_secret=settings.api_secret,
-        base_url=base_url,
-    )
-    option_chain = OptionChain(api_client)
-    data_cache.api_client = api_client
-    strategy_trader = OptionTrader(api_client)
+    # 客户端按新设置在首次使用时重建；数据缓存刷新时经工厂取客户端，始终与当前设置一致
+    get_api_client.cache_clear()
+    data_cache.api_client_factory = get_api_client
+    get_strategy_trader.cache_clear()
+    # 测试网/主网切换后现货价格不再有效
+    _PRICE_CACHE.clear()
 
-    app.config['STRATEGY_TRADER'] = strategy_trader
+    app.config['STRATEGY_TRADER_FACTORY'] = get_strategy_trader
     app.config['PRICE_MONITOR_BASE'] = settings.price_monitor_base
     app.config['STRATEGY_WEBHOOK_BASE'] = settings.strategy_webhook_base
 
@@ -59,41 +123,36 @@ def apply_runtime_settings(settings: AppSettings) -> None:
 apply_runtime_settings(current_settings)
 
 # 关注列表持久化
+# 读-复制-更新：快照字典发布后不再修改，读者无需加锁，写者复制后在锁内替换
 watchlist_lock = Lock()
-watchlist = []
+# symbol -> 关注项（保持加入顺序）
+watchlist: Dict[str, dict] = {}
 
 
 def _load_watchlist_from_disk():
+    global watchlist
     items = watchlist_manager.load()
-    if items:
-        watchlist.extend(items)
+    watchlist = {item['symbol']: item for item in items or [] if item.get('symbol')}
 
 
 _load_watchlist_from_disk()
 
 
+# 关注列表保存的期权字段（顺序即返回结构的字段顺序）
+WATCHLIST_FIELDS = (
+    'symbol', 'base_coin', 'option_type', 'strike_price',
+    'expiry_date', 'expiry_date_formatted', 'days_to_expiry',
+    'bid_price', 'ask_price', 'mark_price', 'iv', 'delta',
+    'volume_24h', 'open_interest',
+    'price_diff', 'price_diff_pct', 'in_the_money'
+)
+
+
 def serialize_option_for_watchlist(option: dict) -> dict:
-    """提取关注列表所需的字段，保持返回结构一致"""
-    return {
-        'symbol': option.get('symbol'),
-        'base_coin': option.get('base_coin'),
-        'option_type': option.get('option_type'),
-        'strike_price': option.get('strike_price'),
-        'expiry_date': option.get('expiry_date'),
-        'expiry_date_formatted': option.get('expiry_date_formatted'),
-        'days_to_expiry': option.get('days_to_expiry'),
-        'bid_price': option.get('bid_price'),
-        'ask_price': option.get('ask_price'),
-        'mark_price': option.get('mark_price'),
-        'iv': option.get('iv'),
-        'delta': option.get('delta'),
-        'volume_24h': option.get('volume_24h'),
-        'open_interest': option.get('open_interest'),
-        'price_diff': option.get('price_diff'),
-        'price_diff_pct': option.get('price_diff_pct'),
-        'in_the_money': option.get('in_the_money'),
-        'added_at': datetime.utcnow().isoformat() + 'Z'
-    }
+    """提取关注列表所需的字段，保持返回结构一致（缺失字段为None）"""
+    item = dict(zip(WATCHLIST_FIELDS, map(option.get, WATCHLIST_FIELDS)))
+    item['added_at'] = datetime.utcnow().isoformat() + 'Z'
+    return item
 
 
 def _get_cached_option(symbol: str, base_coin: str) -> Optional[dict]:
@@ -101,15 +160,42 @@ def _get_cached_option(symbol: str, base_coin: str) -> Optional[dict]:
     if not symbol:
         return None
 
-    options = data_cache.get_cached_options(base_coin)
-    for option in options:
-        if option.get('symbol') == symbol:
-            return option
-    return None
+    return data_cache.get_cached_option(base_coin, symbol)
 
 
-def _format_expiry_details(expiry_timestamp: Optional[int]) -> Dict[str, Optional[int]]:
-    """根据到期时间戳计算显示字段"""
+def _get_spot(base_coin: str) -> float:
+    """获取现货价格（缓存2秒，拉取失败时回退到参考价格）"""
+    base_coin = base_coin.upper()
+    now_ms = int(time.time() * 1000)
+    cached = _PRICE_CACHE.get(base_coin)
+    if cached and cached[1] > now_ms:
+        return cached[0]
+
+    price = FALLBACK_SPOT_PRICES.get(base_coin, 0)
+    result = get_api_client().get_spot_ticker(f"{base_coin}USDT")
+    if result.get('retCode') == 0:
+        tickers = result.get('result', {}).get('list') or []
+        try:
+            price = float(tickers[0]['lastPrice'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            pass
+
+    _PRICE_CACHE[base_coin] = (price, now_ms + SPOT_PRICE_TTL_MS)
+    return price
+
+
+@lru_cache(maxsize=4096)
+def _format_expiry_ms(expiry_ms: int) -> str:
+    """格式化到期时间（同一到期时间只格式化一次）"""
+    return datetime.fromtimestamp(expiry_ms / 1000).strftime('%Y-%m-%d %H:%M')
+
+
+def _format_expiry_details(expiry_timestamp: Optional[int], now_ms: Optional[int] = None,
+                           days_to_expiry: Optional[int] = None) -> Dict[str, Optional[int]]:
+    """根据到期时间戳计算显示字段
+
+    now_ms 可由调用方统一传入，避免逐条取当前时间；批量刷新时也可直接传入已算好的 days_to_expiry。
+    """
     if not expiry_timestamp:
         return {
             'expiry_date': None,
@@ -118,33 +204,47 @@ def _format_expiry_details(expiry_timestamp: Optional[int]) -> Dict[str, Optiona
         }
 
     try:
-        expiry_dt = datetime.fromtimestamp(int(expiry_timestamp) / 1000)
-    except (ValueError, TypeError, OSError):
+        expiry_ms = int(expiry_timestamp)
+        expiry_formatted = _format_expiry_ms(expiry_ms)
+    except (ValueError, TypeError, OSError, OverflowError):
         return {
             'expiry_date': expiry_timestamp,
             'expiry_date_formatted': None,
             'days_to_expiry': None
         }
 
-    days_to_expiry = (expiry_dt - datetime.now()).days
+    if days_to_expiry is None:
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        days_to_expiry = (expiry_ms - now_ms) // DAY_MS
 
     return {
-        'expiry_date': int(expiry_timestamp),
-        'expiry_date_formatted': expiry_dt.strftime('%Y-%m-%d %H:%M'),
+        'expiry_date': expiry_ms,
+        'expiry_date_formatted': expiry_formatted,
         'days_to_expiry': days_to_expiry
     }
 
 
-def _refresh_watchlist_entry(entry: dict) -> dict:
-    """使用最新缓存数据更新关注项"""
-    symbol = entry.get('symbol')
-    base_coin = entry.get('base_coin', 'BTC')
+def _expiry_ms_or_zero(option: Optional[dict]) -> int:
+    """取期权的到期时间戳（毫秒），缺失或无效时返回0"""
+    if not option:
+        return 0
+    try:
+        return int(option.get('expiry_date') or 0)
+    except (ValueError, TypeError):
+        return 0
 
-    cached_option = _get_cached_option(symbol, base_coin)
+
+def _refresh_watchlist_entry(entry: dict, cached_option: Optional[dict],
+                             expiry_details: Optional[Dict[str, Optional[int]]] = None) -> dict:
+    """使用最新缓存数据生成刷新后的关注项（不修改传入的 entry）"""
+    base_coin = entry.get('base_coin', 'BTC')
 
     if cached_option:
-        expiry_details = _format_expiry_details(cached_option.get('expiry_date'))
-        entry.update({
+        if expiry_details is None:
+            expiry_details = _format_expiry_details(cached_option.get('expiry_date'))
+        return {
+            **entry,
             'strike_price': cached_option.get('strike_price', entry.get('strike_price')),
             'option_type': cached_option.get('option_type', entry.get('option_type')),
             'base_coin': cached_option.get('base_coin', base_coin),
@@ -159,23 +259,139 @@ def _refresh_watchlist_entry(entry: dict) -> dict:
             **expiry_details,
             'stale': False,
             'last_updated': datetime.utcnow().isoformat() + 'Z'
-        })
-    else:
-        entry.setdefault('base_coin', base_coin)
-        entry['stale'] = True
-        entry['last_updated'] = datetime.utcnow().isoformat() + 'Z'
+        }
+
+    return {
+        **entry,
+        'base_coin': base_coin,
+        'stale': True,
+        'last_updated': datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+def _get_watchlist_items() -> List[dict]:
+    """刷新并返回关注列表数据（无需持有锁）"""
+    global watchlist
+    snapshot = watchlist
+    entries = list(snapshot.items())
+    cached_options = [
+        _get_cached_option(item.get('symbol'), item.get('base_coin', 'BTC'))
+        for _, item in entries
+    ]
+
+    # 一次性向量化计算所有关注项的剩余天数
+    now_ms = int(time.time() * 1000)
+    expiry_ms = np.fromiter((_expiry_ms_or_zero(option) for option in cached_options),
+                            dtype=np.int64, count=len(entries))
+    days_to_expiry = ((expiry_ms - now_ms) // DAY_MS).tolist()
+
+    refreshed = {}
+    for (symbol, item), cached_option, expiry, days in zip(entries, cached_options,
+                                                            expiry_ms.tolist(), days_to_expiry):
+        expiry_details = None
+        if cached_option:
+            # 时间戳无效时交给 _format_expiry_details 走原有的兜底逻辑
+            expiry_details = _format_expiry_details(
+                cached_option.get('expiry_date'), now_ms,
+                days_to_expiry=days if expiry else None
+            )
+        refreshed[symbol] = _refresh_watchlist_entry(item, cached_option, expiry_details)
+
+    # 期间没有写者替换快照时发布刷新结果；否则以写者的快照为准
+    with watchlist_lock:
+        if watchlist is snapshot:
+            watchlist = refreshed
+
+    return list(refreshed.values())
+
+
+def _update_watchlist(symbol: str, item: Optional[dict]) -> None:
+    """复制当前快照并替换（item为None表示清空），同时安排持久化"""
+    global watchlist
+    with watchlist_lock:
+        if item is None:
+            watchlist = {}
+            watchlist_manager.clear()
+            return
+        updated = dict(watchlist)
+        updated[symbol] = item
+        watchlist = updated
+        # 标记待保存，由后台线程合并写盘
+        watchlist_manager.mark_dirty(list(updated.values()))
+
+SEARCH_DIRECTIONS = frozenset(('Call', 'Put'))
+
+
+def _parse_search_params(params: dict) -> Tuple[str, str, float, int]:
+    """统一解析并校验搜索参数，返回 (base_coin, direction, target_price, days)"""
+    direction = params.get('direction', 'Call')
+    if direction not in SEARCH_DIRECTIONS:
+        raise ValueError(f'不支持的期权方向: {direction}')
+
+    return (
+        params.get('base_coin', 'BTC'),
+        direction,
+        float(params.get('target_price', 0)),
+        int(params.get('days', 0))
+    )
 
-    return entry
 
+def _find_matching_options(base_coin: str, direction: str, target_price: float, days: int,
+                           limit: int, extra_fields: Optional[dict] = None) -> Tuple[List[dict], datetime, datetime]:
+    """筛选方向一致、到期日在目标天数±10天内的期权，返回执行价最接近目标价的limit个
 
-def _get_watchlist_items_locked() -> List[dict]:
-    """刷新并返回关注列表数据（调用者需持有锁）"""
-    updated_items: List[dict] = []
-    for index, item in enumerate(watchlist):
-        refreshed = _refresh_watchlist_entry(item)
-        watchlist[index] = refreshed
-        updated_items.append(dict(refreshed))  # 返回浅拷贝以避免外部修改
-    return updated_items
+    extra_fields 会一并写入每个结果。
+    """
+    extra_fields = extra_fields or {}
+    # 计算目标日期范围（正负10天），全部使用毫秒整数运算
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms + (days - 10) * DAY_MS
+    end_ms = now_ms + (days + 10) * DAY_MS
+    start_date = datetime.fromtimestamp(start_ms / 1000)
+    end_date = datetime.fromtimestamp(end_ms / 1000)
+    
+    cached_options = data_cache.get_cached_options(base_coin)
+    if direction not in SEARCH_DIRECTIONS or not cached_options:
+        return [], start_date, end_date
+    
+    # 在列式数组上一次性完成类型和时间窗口筛选（有numba时走JIT内核）
+    arrays = data_cache.get_option_arrays(base_coin)
+    expiry_ms = arrays['expiry_ms']
+    indices, diffs = filter_options(
+        expiry_ms, arrays['strike'], arrays['is_call'], direction == 'Call',
+        start_ms, end_ms, target_price
+    )
+    if len(indices) > limit:
+        top = np.argpartition(diffs, limit - 1)[:limit]
+        indices, diffs = indices[top], diffs[top]
+    # 按价格差距排序，差距相同时保持原有顺序
+    indices = indices[np.lexsort((indices, diffs))]
+    
+    # 价格差距等数值列在数组上整体计算，只为最终结果构建字典和格式化日期
+    want_call = direction == 'Call'
+    diffs = np.abs(arrays['strike'][indices] - target_price)
+    diff_pcts = (diffs / target_price * 100) if target_price > 0 else np.zeros_like(diffs)
+    days_to_expiry = (expiry_ms[indices] - now_ms) // DAY_MS
+    results = []
+    for index, option_expiry_ms, days, price_diff, price_diff_pct in zip(
+            indices.tolist(), expiry_ms[indices].tolist(), days_to_expiry.tolist(),
+            diffs.tolist(), diff_pcts.tolist()):
+        option = cached_options[index]
+        strike_price = option['strike_price']
+        
+        # 每个结果一次性构建，避免 copy() 后逐个插入引起扩容
+        results.append({
+            **option,
+            'expiry_date_formatted': _format_expiry_ms(option_expiry_ms),
+            'days_to_expiry': days,
+            'price_diff': price_diff,
+            'price_diff_pct': price_diff_pct,
+            # 判断期权是否价内
+            'in_the_money': strike_price < target_price if want_call else strike_price > target_price,
+            **extra_fields
+        })
+    
+    return results, start_date, end_date
 
 @app.route('/')
 def index():
@@ -195,13 +411,10 @@ def search_options():
     try:
         data = request.get_json()
         
-        # 获取搜索参数
-        direction = data.get('direction', 'Call')  # Call 或 Put
-        target_price = float(data.get('target_price', 0))
-        days = int(data.get('days', 0))
-        base_coin = data.get('base_coin', 'BTC')
+        # 获取搜索参数（direction 为 Call 或 Put）
+        base_coin, direction, target_price, days = _parse_search_params(data)
         
-        print(f"搜索参数: 方向={direction}, 目标价格={target_price}, 天数={days}, 基础币={base_coin}")
+        logger.debug("搜索参数: 方向=%s, 目标价格=%s, 天数=%s, 基础币=%s", direction, target_price, days, base_coin)
         
         # 从缓存获取期权数据
         cached_options = data_cache.get_cached_options(base_coin)
@@ -212,56 +425,11 @@ def search_options():
                 'message': '暂无缓存数据，请先刷新数据'
             })
         
-        # 计算目标日期范围（正负10天）
-        target_date = datetime.now() + timedelta(days=days)
-        start_date = target_date - timedelta(days=10)
-        end_date = target_date + timedelta(days=10)
-        
-        # 筛选符合条件的期权
-        filtered_options = []
-        
-        for option in cached_options:
-            # 筛选期权类型
-            if option['option_type'] != direction:
-                continue
-                
-            # 解析到期时间
-            expiry_timestamp = int(option['expiry_date']) / 1000
-            expiry_date = datetime.fromtimestamp(expiry_timestamp)
-            
-            # 筛选时间范围
-            if not (start_date <= expiry_date <= end_date):
-                continue
-            
-            # 计算到期天数
-            days_to_expiry = (expiry_date - datetime.now()).days
-            
-            # 计算价格与目标价格的差距
-            strike_price = option['strike_price']
-            price_diff = abs(strike_price - target_price)
-            price_diff_pct = (price_diff / target_price * 100) if target_price > 0 else 0
-            
-            # 添加计算的字段
-            option_result = option.copy()
-            option_result['expiry_date_formatted'] = expiry_date.strftime('%Y-%m-%d %H:%M')
-            option_result['days_to_expiry'] = days_to_expiry
-            option_result['price_diff'] = price_diff
-            option_result['price_diff_pct'] = price_diff_pct
-            option_result['base_coin'] = base_coin
-            
-            # 判断期权是否价内
-            if direction == 'Call':
-                option_result['in_the_money'] = strike_price < target_price
-            else:  # Put
-                option_result['in_the_money'] = strike_price > target_price
-                
-            filtered_options.append(option_result)
-        
-        # 按价格差距排序
-        filtered_options.sort(key=lambda x: x['price_diff'])
-        
-        # 限制返回结果数量
-        filtered_options = filtered_options[:50]
+        # 筛选符合条件的期权，按价格差距取前50个
+        filtered_options, start_date, end_date = _find_matching_options(
+            base_coin, direction, target_price, days, limit=50,
+            extra_fields={'base_coin': base_coin}
+        )
         
         return jsonify({
             'success': True,
@@ -277,7 +445,7 @@ def search_options():
         })
         
     except Exception as e:
-        print(f"搜索期权时出错: {e}")
+        logger.warning("搜索期权时出错: %s", e)
         return jsonify({
             'success': False,
             'message': f'搜索失败: {str(e)}'
@@ -285,16 +453,9 @@ def search_options():
 
 @app.route('/get_current_price/<base_coin>')
 def get_current_price(base_coin):
-    """获取当前价格（模拟接口）"""
+    """获取当前现货价格"""
     try:
-        # 这里可以调用实际的价格API
-        # 暂时返回模拟价格
-        prices = {
-            'BTC': 98000,
-            'ETH': 3500
-        }
-        
-        current_price = prices.get(base_coin.upper(), 0)
+        current_price = _get_spot(base_coin)
         
         return jsonify({
             'success': True,
@@ -322,7 +483,7 @@ def get_strike_prices(base_coin):
             })
         
         # 获取当前价格作为参考
-        current_price = 98000 if base_coin == 'BTC' else 3500
+        current_price = _get_spot(base_coin)
         
         strike_list = []
         for strike in strike_prices:
@@ -359,12 +520,23 @@ def get_strike_prices(base_coin):
             'message': str(e)
         })
 
+@app.route('/refresh_data', defaults={'base_coin': None})
 @app.route('/refresh_data/<base_coin>')
 def refresh_data(base_coin):
-    """刷新期权数据"""
+    """刷新期权数据；不指定币种或以逗号分隔多个币种时并发刷新"""
     try:
-        result = data_cache.refresh_option_data(base_coin)
-        return jsonify(result)
+        coins = normalize_coins(base_coin.split(',')) if base_coin else []
+        if len(coins) == 1:
+            return jsonify(data_cache.refresh_option_data(coins[0]))
+        
+        coins = coins or list(SUPPORTED_COINS)
+        results = data_cache.refresh_coins(coins)
+        failed = [coin for coin, result in zip(coins, results) if not result.get('success')]
+        return jsonify({
+            'success': not failed,
+            'message': f"刷新失败: {', '.join(failed)}" if failed else f"成功刷新 {', '.join(coins)} 数据",
+            'results': dict(zip(coins, results))
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -400,15 +572,15 @@ def get_expiry_dates(base_coin):
             })
         
         # 计算每个日期距离现在的天数
-        today = datetime.now()
+        now_ms = int(time.time() * 1000)
         dates_with_days = []
         
         for timestamp in expiry_timestamps:
-            expiry_date = datetime.fromtimestamp(timestamp / 1000)
-            days_diff = (expiry_date - today).days
+            days_diff = (timestamp - now_ms) // DAY_MS
             
-            # 只显示未到期的合约
+            # 只显示未到期的合约（跳过的合约不再构造日期对象）
             if days_diff >= 0:
+                expiry_date = datetime.fromtimestamp(timestamp / 1000)
                 dates_with_days.append({
                     'date': expiry_date.strftime('%Y-%m-%d'),
                     'datetime': expiry_date.strftime('%Y-%m-%d %H:%M'),
@@ -433,9 +605,8 @@ def get_expiry_dates(base_coin):
 @app.route('/watchlist', methods=['GET'])
 def get_watchlist():
     """获取关注列表"""
-    with watchlist_lock:
-        items = _get_watchlist_items_locked()
-        watchlist_manager.save(items)
+    # 仅刷新行情字段，不触发磁盘写入，也不阻塞写者
+    items = _get_watchlist_items()
 
     return jsonify({
         'success': True,
@@ -460,15 +631,8 @@ def add_to_watchlist():
 
         watchlist_item = serialize_option_for_watchlist(option)
 
-        with watchlist_lock:
-            for index, item in enumerate(watchlist):
-                if item.get('symbol') == symbol:
-                    watchlist[index] = watchlist_item
-                    break
-            else:
-                watchlist.append(watchlist_item)
-            items = _get_watchlist_items_locked()
-            watchlist_manager.save(items)
+        _update_watchlist(symbol, watchlist_item)
+        items = _get_watchlist_items()
 
         return jsonify({
             'success': True,
@@ -485,9 +649,7 @@ def add_to_watchlist():
 @app.route('/watchlist', methods=['DELETE'])
 def clear_watchlist():
     """清空关注列表"""
-    with watchlist_lock:
-        watchlist.clear()
-        watchlist_manager.clear()
+    _update_watchlist('', None)
 
     return jsonify({
         'success': True,
@@ -565,19 +727,38 @@ def ai_chat(provider):
             'message': f'对话失败: {str(e)}'
         })
 
+@app.route('/ai/chat/<provider>/stream', methods=['POST'])
+def ai_chat_stream(provider):
+    """AI流式对话（纯文本分块返回）"""
+    data = request.get_json() or {}
+    user_message = data.get('message', '')
+    context = data.get('context', {})
+    
+    if not user_message.strip():
+        return jsonify({
+            'success': False,
+            'message': '消息内容不能为空'
+        })
+    
+    def generate():
+        try:
+            for chunk in ai_assistant.chat_stream(provider, user_message, context):
+                yield chunk
+        except Exception as e:
+            yield f'\n[对话失败: {str(e)}]'
+    
+    return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+
 @app.route('/ai/analyze/<provider>', methods=['POST'])
 def ai_analyze_options(provider):
-    """AI分析期权数据"""
+    """AI分析期权数据；provider 以逗号分隔多个时并行交给各提供商分析"""
     try:
         data = request.get_json()
         user_query = data.get('query', '请分析这些期权数据并给出交易建议')
         search_params = data.get('search_params', {})
         
         # 获取当前搜索的期权数据
-        base_coin = search_params.get('base_coin', 'BTC')
-        direction = search_params.get('direction', 'Call')
-        target_price = float(search_params.get('target_price', 0))
-        days = int(search_params.get('days', 0))
+        base_coin, direction, target_price, days = _parse_search_params(search_params)
         
         # 从缓存获取期权数据并进行筛选
         cached_options = data_cache.get_cached_options(base_coin)
@@ -588,51 +769,10 @@ def ai_analyze_options(provider):
                 'message': '暂无期权数据，请先刷新数据'
             })
         
-        # 计算目标日期范围（正负10天）
-        target_date = datetime.now() + timedelta(days=days)
-        start_date = target_date - timedelta(days=10)
-        end_date = target_date + timedelta(days=10)
-        
-        # 筛选符合条件的期权
-        filtered_options = []
-        
-        for option in cached_options:
-            # 筛选期权类型
-            if option['option_type'] != direction:
-                continue
-                
-            # 解析到期时间
-            expiry_timestamp = int(option['expiry_date']) / 1000
-            expiry_date = datetime.fromtimestamp(expiry_timestamp)
-            
-            # 筛选时间范围
-            if not (start_date <= expiry_date <= end_date):
-                continue
-            
-            # 计算额外字段
-            days_to_expiry = (expiry_date - datetime.now()).days
-            strike_price = option['strike_price']
-            price_diff = abs(strike_price - target_price)
-            price_diff_pct = (price_diff / target_price * 100) if target_price > 0 else 0
-            
-            # 添加计算的字段
-            option_result = option.copy()
-            option_result['expiry_date_formatted'] = expiry_date.strftime('%Y-%m-%d %H:%M')
-            option_result['days_to_expiry'] = days_to_expiry
-            option_result['price_diff'] = price_diff
-            option_result['price_diff_pct'] = price_diff_pct
-            
-            # 判断价内价外
-            if direction == 'Call':
-                option_result['in_the_money'] = strike_price < target_price
-            else:
-                option_result['in_the_money'] = strike_price > target_price
-                
-            filtered_options.append(option_result)
-        
-        # 按价格差距排序，取前20个
-        filtered_options.sort(key=lambda x: x['price_diff'])
-        analysis_data = filtered_options[:20]
+        # 筛选符合条件的期权，按价格差距取前20个
+        analysis_data, _, _ = _find_matching_options(
+            base_coin, direction, target_price, days, limit=20
+        )
         
         if not analysis_data:
             return jsonify({
@@ -640,6 +780,20 @@ def ai_analyze_options(provider):
                 'message': '没有找到符合条件的期权数据'
             })
         
+        # 以逗号分隔多个提供商时，同一份数据并行交给各提供商分析
+        providers = list(dict.fromkeys(p for p in provider.split(',') if p))
+        if len(providers) > 1:
+            results = ai_assistant.analyze_options_data_multi(providers, analysis_data, user_query)
+            for result in results.values():
+                if result.get('success'):
+                    result['tasks'] = ai_assistant.generate_trading_tasks(result.get('response', ''))
+            failed = [name for name, result in results.items() if not result.get('success')]
+            return jsonify({
+                'success': len(failed) < len(results),
+                'message': f"分析失败: {', '.join(failed)}" if failed else '分析完成',
+                'results': results
+            })
+        
         # 调用AI分析
         result = ai_assistant.analyze_options_data(provider, analysis_data, user_query)
         
@@ -695,9 +849,13 @@ def internal_error(error):
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
-    print("启动Bybit期权链搜索Web应用...")
-    print(f"API配置: {'已设置' if api_client.api_key else '未设置'}")
-    print(f"环境: {'测试网' if Config.BYBIT_TESTNET else '生产环境'}")
-    print("访问地址: http://localhost:8080")
+    # 根日志级别为WARNING，启动信息单独按INFO输出
+    logger.setLevel(logging.INFO)
+    logger.info("启动Bybit期权链搜索Web应用...")
+    logger.info("API配置: %s", '已设置' if get_api_client().api_key else '未设置')
+    logger.info("环境: %s", '测试网' if Config.BYBIT_TESTNET else '生产环境')
+    logger.info("访问地址: http://localhost:8080")
     
-    app.run(debug=True, host='0.0.0.0', port=8080)
+    # 开发服务器仅供本地使用；生产环境请通过 wsgi.py 交给 gunicorn 运行
+    debug = os.getenv('FLASK_DEBUG') == '1'
+    app.run(debug=debug, host='0.0.0.0', port=8080, threaded=True)
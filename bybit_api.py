@@ -1,14 +1,79 @@
 """
 Bybit API 客户端
 """
+import asyncio
 import hashlib
 import hmac
-import json
+import logging
+import threading
 import time
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Any, AsyncIterator, TypedDict
+from urllib.parse import urlencode
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import Config
 
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentItem(TypedDict, total=False):
+    """期权合约信息中刷新缓存用到的字段"""
+    symbol: str
+    status: str
+    baseCoin: str
+    quoteCoin: str
+    optionsType: str
+    deliveryTime: str
+
+
+class InstrumentsResult(TypedDict, total=False):
+    category: str
+    nextPageCursor: str
+    list: List[InstrumentItem]
+
+
+class InstrumentsPage(TypedDict, total=False):
+    """期权合约信息接口的单页返回"""
+    retCode: int
+    retMsg: str
+    result: InstrumentsResult
+
+
+if MSGSPEC_AVAILABLE:
+    # 按结构解码时直接跳过未用到的字段（priceFilter、lotSizeFilter 等），不为其构建字典
+    _decode_instruments_page = msgspec.json.Decoder(InstrumentsPage).decode
+    _DECODE_ERRORS = (orjson.JSONDecodeError, msgspec.DecodeError)
+else:
+    _decode_instruments_page = orjson.loads
+    _DECODE_ERRORS = (orjson.JSONDecodeError,)
+
+
+# 执行价格解析缓存容量：覆盖各币种全部在市期权合约（每币种数千个）并留有余量，刷新时不会被挤出
+STRIKE_CACHE_SIZE = 32768
+
+
+@lru_cache(maxsize=STRIKE_CACHE_SIZE)
+def parse_strike(symbol: str) -> Optional[float]:
+    """从期权合约代码（如 BTC-27DEC24-100000-C）解析执行价格，无法解析时返回 None；合约代码反复出现，结果缓存"""
+    parts = symbol.split('-', 3)
+    if len(parts) < 3:
+        return None
+    try:
+        return float(parts[2])
+    except ValueError:
+        return None
+
 
 class BybitAPI:
     """Bybit API 客户端类"""
@@ -19,46 +84,80 @@ def __init__(self, api_key: str = None, api_secret: str = None, *, base_url: str
         self.api_secret = api_secret or Config.BYBIT_API_SECRET
         self.base_url = base_url or Config.BYBIT_BASE_URL
         self.timeout = Config.REQUEST_TIMEOUT
+        self._build_signer()
+        
+        # 复用连接池，避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[429, 502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+        # 公开行情接口的异步客户端（惰性创建，用于并发拉取多个接口）
+        # 客户端绑定所在线程的事件循环，因此按线程各持一个，多线程并发刷新互不干扰
+        self._async_local = threading.local()
         
         if not self.api_key or not self.api_secret:
-            print("警告: API 密钥未设置，将只能使用公开接口")
+            logger.warning("API 密钥未设置，将只能使用公开接口")
 
     def update_credentials(self, api_key: str, api_secret: str, base_url: str):
         """动态更新凭证"""
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = base_url
+        self._build_signer()
+        # 异步客户端的base_url已变化，下次使用时重建
+        self._async_local = threading.local()
+    
+    def _build_signer(self):
+        """预先以密钥初始化HMAC上下文，签名时复制即可，免去每次的密钥编码与初始化"""
+        if self.api_secret:
+            self._hmac_template = hmac.new(self.api_secret.encode("utf-8"), None, hashlib.sha256)
+        else:
+            self._hmac_template = None
     
     def _generate_signature(self, params: str, timestamp: str, recv_window: str) -> str:
         """生成签名"""
-        param_str = timestamp + self.api_key + recv_window + params
-        return hmac.new(
-            bytes(self.api_secret, "utf-8"),
-            param_str.encode("utf-8"),
-            hashlib.sha256
-        ).hexdigest()
-    
-    def _make_request(self, method: str, endpoint: str, params: Dict = None, signed: bool = False) -> Dict:
-        """发送请求"""
+        param_str = ''.join((timestamp, self.api_key, recv_window, params))
+        signer = self._hmac_template.copy()
+        signer.update(param_str.encode("utf-8"))
+        return signer.hexdigest()
+    
+    def _request_public(self, method: str, endpoint: str, params: Dict = None) -> Dict:
+        """发送公开请求（无需签名，Content-Type 已设置在会话默认头中）"""
         url = f"{self.base_url}{endpoint}"
-        headers = {
-            'Content-Type': 'application/json'
-        }
+        if method == 'GET':
+            return self._send(self.session.get, url, params=params)
+        return self._send(self.session.post, url, data=orjson.dumps(params) if params else b'')
+    
+    def _request_signed(self, method: str, endpoint: str, params: Dict = None) -> Dict:
+        """发送需要签名的私有请求"""
+        url = f"{self.base_url}{endpoint}"
+        headers = {}
+        if method == 'GET':
+            # 按键排序并转义，签名与实际发送的查询串完全一致，不再交给requests二次编码
+            param_str = urlencode(sorted((k, str(v)) for k, v in (params or {}).items()))
+            if param_str:
+                url = f"{url}?{param_str}"
+        else:
+            # POST请求体只序列化一次，签名与实际发送的内容完全一致
+            body = orjson.dumps(params) if params else b''
+            param_str = body.decode('utf-8')
         
-        # 对于需要签名的请求，添加API密钥
-        if signed and self.api_key:
+        if self.api_key:
             headers['X-BAPI-API-KEY'] = self.api_key
         
-        if signed and self.api_key and self.api_secret:
+        if self.api_key and self.api_secret:
             timestamp = str(int(time.time() * 1000))
             recv_window = '5000'
-            
-            if method == 'GET':
-                query_string = '&'.join([f"{k}={v}" for k, v in (params or {}).items()])
-                param_str = query_string
-            else:
-                param_str = json.dumps(params) if params else ''
-            
             signature = self._generate_signature(param_str, timestamp, recv_window)
             
             headers.update({
@@ -67,30 +166,134 @@ def _make_request(self, method: str, endpoint: str, params: Dict = None, signed:
                 'X-BAPI-RECV-WINDOW': recv_window
             })
         
+        if method == 'GET':
+            return self._send(self.session.get, url, headers=headers)
+        return self._send(self.session.post, url, data=body, headers=headers)
+    
+    def _send(self, send, url: str, **kwargs) -> Dict:
+        """执行请求并解析响应，出错时返回 retCode=-1"""
         try:
-            if method == 'GET':
-                response = requests.get(url, params=params, headers=headers, timeout=self.timeout)
-            else:
-                response = requests.post(url, json=params, headers=headers, timeout=self.timeout)
+            response = send(url, timeout=self.timeout, **kwargs)
             
             # 如果是403错误，可能是IP白名单或API权限问题
             if response.status_code == 403:
-                print(f"403错误: 可能的原因 - IP未加入白名单、API权限不足或签名错误")
-                print(f"请求URL: {url}")
+                logger.warning("403错误: 可能的原因 - IP未加入白名单、API权限不足或签名错误, 请求URL: %s", url)
                 
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             # 检查API返回的错误码
             if result.get('retCode') != 0:
-                print(f"API错误: {result.get('retMsg', '未知错误')}")
+                logger.warning("API错误: %s", result.get('retMsg', '未知错误'))
                 
             return result
         
-        except requests.exceptions.RequestException as e:
-            print(f"请求错误: {e}")
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.warning("请求错误: %s", e)
             return {'retCode': -1, 'retMsg': str(e)}
     
+    def _get_async_session(self) -> httpx.AsyncClient:
+        """获取异步客户端（客户端绑定事件循环，用完需调用 aclose）"""
+        session = getattr(self._async_local, 'session', None)
+        if session is None or session.is_closed:
+            session = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http2=True,
+                limits=httpx.Limits(max_connections=16)
+            )
+            self._async_local.session = session
+        return session
+    
+    async def aclose(self):
+        """关闭异步客户端"""
+        session = getattr(self._async_local, 'session', None)
+        if session is not None:
+            self._async_local.session = None
+            await session.aclose()
+    
+    async def _aget(self, endpoint: str, params: Dict = None,
+                    decode: Callable[[bytes], Dict] = orjson.loads) -> Dict:
+        """异步发送公开GET请求（不签名），返回结构与 _request_public 一致"""
+        try:
+            response = await self._get_async_session().get(endpoint, params=params)
+            response.raise_for_status()
+            result = decode(response.content)
+            
+            if result.get('retCode') != 0:
+                logger.warning("API错误: %s", result.get('retMsg', '未知错误'))
+                
+            return result
+        
+        except (httpx.HTTPError, *_DECODE_ERRORS) as e:
+            logger.warning("请求错误: %s", e)
+            return {'retCode': -1, 'retMsg': str(e)}
+    
+    async def aget_option_chain(self, base_coin: str = 'BTC', limit: int = 1000, cursor: str = None) -> Dict:
+        """异步获取期权链数据（单页，安装 msgspec 时只解码刷新缓存用到的字段）"""
+        params = {
+            'category': 'option',
+            'baseCoin': base_coin,
+            'limit': limit
+        }
+        if cursor:
+            params['cursor'] = cursor
+        return await self._aget('/v5/market/instruments-info', params, decode=_decode_instruments_page)
+    
+    async def aiter_option_chain(self, base_coin: str = 'BTC', limit: int = 1000) -> AsyncIterator[Dict]:
+        """异步逐页获取期权链，在调用方处理当前页时已预取下一页
+        
+        每页为完整的接口返回；出错的页原样返回后停止。
+        """
+        task = asyncio.create_task(self.aget_option_chain(base_coin, limit))
+        while task is not None:
+            page = await task
+            task = None
+            if page.get('retCode') == 0:
+                cursor = page.get('result', {}).get('nextPageCursor')
+                if cursor and page.get('result', {}).get('list'):
+                    task = asyncio.create_task(self.aget_option_chain(base_coin, limit, cursor))
+            yield page
+    
+    async def aget_full_option_chain(self, base_coin: str = 'BTC', limit: int = 1000) -> Dict:
+        """异步获取全部分页的期权链，合并为单个返回结构"""
+        instruments: List[Dict] = []
+        async for page in self.aiter_option_chain(base_coin, limit):
+            if page.get('retCode') != 0:
+                return page
+            instruments.extend(page.get('result', {}).get('list', []))
+        
+        return {'retCode': 0, 'retMsg': 'OK', 'result': {'category': 'option', 'list': instruments}}
+    
+    async def aget_option_tickers(self, base_coin: str = 'BTC', limit: int = 1000) -> Dict:
+        """异步获取期权ticker数据"""
+        return await self._aget('/v5/market/tickers', {
+            'category': 'option',
+            'baseCoin': base_coin,
+            'limit': limit
+        })
+    
+    def get_option_snapshot(self, base_coin: str = 'BTC') -> tuple:
+        """并发获取期权合约信息与ticker数据，返回 (instruments_result, tickers_result)"""
+        async def _run():
+            try:
+                return await asyncio.gather(
+                    self.aget_full_option_chain(base_coin),
+                    self.aget_option_tickers(base_coin=base_coin)
+                )
+            finally:
+                await self.aclose()
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            instruments_result, tickers_result = asyncio.run(_run())
+        else:
+            # 调用方已处于事件循环中，无法直接 asyncio.run，改在独立线程中运行
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                instruments_result, tickers_result = executor.submit(asyncio.run, _run()).result()
+        return instruments_result, tickers_result
+    
     def get_option_chain(self, base_coin: str = 'BTC', limit: int = 1000) -> Dict:
         """获取期权链数据"""
         endpoint = '/v5/market/instruments-info'
@@ -100,7 +303,7 @@ def get_option_chain(self, base_coin: str = 'BTC', limit: int = 1000) -> Dict:
             'limit': limit
         }
         
-        return self._make_request('GET', endpoint, params, signed=False)
+        return self._request_public('GET', endpoint, params)
     
     def get_option_tickers(self, symbol: str = None, base_coin: str = 'BTC', limit: int = 1000) -> Dict:
         """获取期权ticker数据"""
@@ -118,7 +321,16 @@ def get_option_tickers(self, symbol: str = None, base_coin: str = 'BTC', limit:
         if not symbol:
             params['limit'] = limit
             
-        return self._make_request('GET', endpoint, params, signed=False)
+        return self._request_public('GET', endpoint, params)
+    
+    def get_spot_ticker(self, symbol: str) -> Dict:
+        """获取现货ticker数据（如 BTCUSDT）"""
+        endpoint = '/v5/market/tickers'
+        params = {
+            'category': 'spot',
+            'symbol': symbol
+        }
+        return self._request_public('GET', endpoint, params)
     
     def get_positions(self, category: str = 'option', symbol: str = None) -> Dict:
         """获取持仓信息"""
@@ -130,7 +342,7 @@ def get_positions(self, category: str = 'option', symbol: str = None) -> Dict:
         if symbol:
             params['symbol'] = symbol
             
-        return self._make_request('GET', endpoint, params, signed=True)
+        return self._request_signed('GET', endpoint, params)
     
     def get_wallet_balance(self, account_type: str = 'UNIFIED') -> Dict:
         """获取钱包余额"""
@@ -139,7 +351,7 @@ def get_wallet_balance(self, account_type: str = 'UNIFIED') -> Dict:
             'accountType': account_type
         }
         
-        return self._make_request('GET', endpoint, params, signed=True)
+        return self._request_signed('GET', endpoint, params)
     
     def get_option_greeks(self, base_coin: str = 'BTC') -> Dict:
         """获取期权希腊字母"""
@@ -149,12 +361,12 @@ def get_option_greeks(self, base_coin: str = 'BTC') -> Dict:
             'baseCoin': base_coin
         }
         
-        return self._make_request('GET', endpoint, params, signed=False)
+        return self._request_public('GET', endpoint, params)
     
     def get_api_key_info(self) -> Dict:
         """获取API密钥信息和权限"""
         endpoint = '/v5/user/query-api'
-        return self._make_request('GET', endpoint, signed=True)
+        return self._request_signed('GET', endpoint)
     
     def place_order(self, category: str, symbol: str, side: str, order_type: str, 
                    qty: str, price: str = None, time_in_force: str = "GTC") -> Dict:
@@ -180,7 +392,7 @@ def place_order(self, category: str, symbol: str, side: str, order_type: str,
             if price:
                 params['price'] = price
             
-        return self._make_request('POST', endpoint, params, signed=True)
+        return self._request_signed('POST', endpoint, params)
     
     def get_order_history(self, category: str = 'option', symbol: str = None, limit: int = 50) -> Dict:
         """获取订单历史"""
@@ -193,7 +405,7 @@ def get_order_history(self, category: str = 'option', symbol: str = None, limit:
         if symbol:
             params['symbol'] = symbol
             
-        return self._make_request('GET', endpoint, params, signed=True)
+        return self._request_signed('GET', endpoint, params)
     
     def cancel_order(self, category: str, symbol: str, order_id: str = None, 
                     order_link_id: str = None) -> Dict:
@@ -209,4 +421,4 @@ def cancel_order(self, category: str, symbol: str, order_id: str = None,
         elif order_link_id:
             params['orderLinkId'] = order_link_id
             
-        return self._make_request('POST', endpoint, params, signed=True)
+        return self._request_signed('POST', endpoint, params)
@@ -2,12 +2,169 @@
 数据缓存系统
 用于缓存期权链数据，避免频繁API调用
 """
-import json
 import os
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from bybit_api import BybitAPI
+from typing import Callable, Dict, List, Optional, Tuple, TypedDict, Union
+import numpy as np
+import orjson
+from bybit_api import BybitAPI, parse_strike
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def _msgpack_enc_hook(obj):
+    """msgpack不支持的numpy类型转换（与 orjson.OPT_SERIALIZE_NUMPY 行为一致）"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise NotImplementedError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _replace_atomically(target: str, write: Callable[[str], None], fsync: bool = False):
+    """先写同目录下唯一命名的临时文件再原子替换，并发写同一目标互不干扰；失败时删除临时文件"""
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(target) or '.',
+                                    prefix=f"{os.path.basename(target)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_file)
+        if fsync:
+            with open(tmp_file, 'rb+') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_file, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def normalize_coins(coins) -> List[str]:
+    """币种转大写并按原顺序去重；含不支持的币种时抛出 ValueError"""
+    normalized = list(dict.fromkeys(coin.strip().upper() for coin in coins if coin.strip()))
+    unsupported = [coin for coin in normalized if coin not in SUPPORTED_COINS]
+    if unsupported:
+        raise ValueError(f"不支持的币种: {', '.join(unsupported)}（支持 {', '.join(SUPPORTED_COINS)}）")
+    return normalized
+
+
+def _write_bytes(path: str, payload: bytes):
+    """整体写入字节内容"""
+    with open(path, 'wb') as f:
+        f.write(payload)
+
+
+class OptionRecord(TypedDict):
+    """缓存中单个期权合约的记录结构"""
+    symbol: str
+    strike_price: float
+    option_type: str
+    expiry_date: Optional[Union[str, int]]
+    status: str
+    base_coin: str
+    quote_coin: str
+    bid_price: float
+    ask_price: float
+    mark_price: float
+    last_price: float
+    volume_24h: float
+    open_interest: float
+    iv: float
+    delta: float
+    gamma: float
+    theta: float
+    vega: float
+
+
+class OptionCacheData(TypedDict, total=False):
+    """期权缓存数据结构（refresh_option_data 写入的内容）"""
+    options: List[OptionRecord]
+    strike_prices: List[float]
+    expiry_timestamps: List[int]
+    total_contracts: int
+    refresh_time: str
+
+
+class OptionCacheFile(TypedDict):
+    """期权缓存文件结构"""
+    timestamp: float
+    datetime: str
+    data: OptionCacheData
+
+
+if MSGSPEC_AVAILABLE:
+    _MSGPACK_ENCODER = msgspec.msgpack.Encoder(enc_hook=_msgpack_enc_hook)
+    # 按结构类型化解码：字段类型在C层完成校验与转换，结构不符的文件视为损坏
+    _MSGPACK_DECODER = msgspec.msgpack.Decoder(OptionCacheFile)
+
+# 缓存文件扩展名：优先 Arrow Feather（列式、可内存映射），其次 MessagePack，最后回退到 JSON
+if PYARROW_AVAILABLE:
+    CACHE_FILE_EXT = '.feather'
+elif MSGSPEC_AVAILABLE:
+    CACHE_FILE_EXT = '.mpk'
+else:
+    CACHE_FILE_EXT = '.json'
+# 刷新期权数据时可预期的错误：接口数据格式异常、缓存文件写入失败
+_REFRESH_ERRORS = (OSError, ValueError, KeyError, TypeError)
+if MSGSPEC_AVAILABLE:
+    _REFRESH_ERRORS += (msgspec.EncodeError,)
+if PYARROW_AVAILABLE:
+    _REFRESH_ERRORS += (pa.ArrowException,)
+
+# 支持刷新的币种（与前端可选币种一致），未指定币种时全部刷新
+SUPPORTED_COINS = ('BTC', 'ETH')
+# 并发刷新币种的线程上限（每个币种内部还会并发请求接口）
+MAX_REFRESH_WORKERS = 4
+
+# clear_cache 清理的文件后缀（含各格式缓存、统计文件及写入中途的临时文件）
+CACHE_FILE_SUFFIXES = ('.json', '.mpk', '.feather', '.tmp')
+# Feather 文件中以表格存储的字段，其余内容存入 schema 的自定义元数据
+FEATHER_TABLE_FIELD = 'options'
+FEATHER_METADATA_KEY = b'cache'
+# MessagePack 文件以4字节大端长度前缀开头，便于流式读取
+MSGPACK_LENGTH_PREFIX = 4
+
+# 期权数据中的行情数值字段 -> ticker 原始字段（顺序即输出顺序）
+TICKER_NUMERIC_FIELDS = (
+    ('bid_price', 'bid1Price'),
+    ('ask_price', 'ask1Price'),
+    ('mark_price', 'markPrice'),
+    ('last_price', 'lastPrice'),
+    ('volume_24h', 'volume24h'),
+    ('open_interest', 'openInterest'),
+    ('iv', 'markIv'),
+    ('delta', 'delta'),
+    ('gamma', 'gamma'),
+    ('theta', 'theta'),
+    ('vega', 'vega'),
+)
+TICKER_NUMERIC_FIELD_NAMES = tuple(field for field, _ in TICKER_NUMERIC_FIELDS)
+
+@dataclass(slots=True)
+class CachedSet:
+    """内存中单个币种的期权缓存"""
+    options: List[Dict]
+    strikes: List[float]
+    expiries: List[int]
+    loaded_at: float
+
 
 class DataCache:
     """数据缓存管理器"""
@@ -16,20 +173,50 @@ def __init__(self, cache_dir: str = "cache"):
         """初始化缓存管理器"""
         self.cache_dir = cache_dir
         self.api_client = BybitAPI()
+        # 客户端工厂：设置后每次刷新都向工厂取客户端，运行时切换网络或密钥后无需再手动替换 api_client
+        self.api_client_factory: Optional[Callable[[], BybitAPI]] = None
         
         # 确保缓存目录存在
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
         
-        # 内存缓存
-        self.memory_cache = {}
+        # 内存缓存: base_coin -> CachedSet
+        self.memory_cache: Dict[str, CachedSet] = {}
+        # 列式数组缓存: base_coin -> (对应的期权列表, 数组字典)
+        self._array_cache = {}
+        # 合约索引缓存: base_coin -> (对应的期权列表, {symbol: 期权})
+        self._symbol_index = {}
         
     def get_cache_file_path(self, base_coin: str, data_type: str) -> str:
         """获取缓存文件路径"""
-        return os.path.join(self.cache_dir, f"{base_coin}_{data_type}.json")
+        return os.path.join(self.cache_dir, f"{base_coin}_{data_type}{CACHE_FILE_EXT}")
+    
+    def get_meta_file_path(self, base_coin: str, data_type: str) -> str:
+        """获取缓存统计信息（旁路小文件）路径"""
+        return os.path.join(self.cache_dir, f"{base_coin}_{data_type}.meta.json")
+    
+    def _write_meta(self, base_coin: str, data_type: str, meta: Dict):
+        """写入缓存统计信息（先写临时文件再替换，读者不会看到半个文件）"""
+        meta_file = self.get_meta_file_path(base_coin, data_type)
+        payload = orjson.dumps(meta)
+        _replace_atomically(meta_file, partial(_write_bytes, payload=payload))
     
-    def save_to_file(self, data: Dict, base_coin: str, data_type: str):
-        """保存数据到文件"""
+    def _read_meta(self, base_coin: str, data_type: str, cache_file: str) -> Optional[Dict]:
+        """读取缓存统计信息；缺失或比缓存文件旧时返回 None"""
+        meta_file = self.get_meta_file_path(base_coin, data_type)
+        try:
+            if os.stat(meta_file).st_mtime < os.stat(cache_file).st_mtime:
+                return None
+            with open(meta_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+    
+    def save_to_file(self, data: Dict, base_coin: str, data_type: str, fsync: bool = False):
+        """保存数据到文件
+        
+        先写临时文件再原子替换，中途崩溃不会留下损坏的缓存；fsync=True 时落盘后再替换。
+        """
         cache_file = self.get_cache_file_path(base_coin, data_type)
         cache_data = {
             'timestamp': time.time(),
@@ -37,43 +224,116 @@ def save_to_file(self, data: Dict, base_coin: str, data_type: str):
             'data': data
         }
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        # 文件即将被替换，旧的解析结果不再需要
+        self._load_cache_file_cached.cache_clear()
+        
+        if CACHE_FILE_EXT == '.feather':
+            write = partial(self._write_feather, cache_data=cache_data)
+        elif CACHE_FILE_EXT == '.mpk':
+            payload = _MSGPACK_ENCODER.encode(cache_data)
+            payload = len(payload).to_bytes(MSGPACK_LENGTH_PREFIX, 'big') + payload
+            write = partial(_write_bytes, payload=payload)
+        else:
+            payload = orjson.dumps(cache_data, option=orjson.OPT_SERIALIZE_NUMPY)
+            write = partial(_write_bytes, payload=payload)
+        
+        _replace_atomically(cache_file, write, fsync=fsync)
+        
+        # 状态查询只需统计信息，单独写入小文件，避免每次解析整个缓存
+        self._write_meta(base_coin, data_type, {
+            'timestamp': cache_data['timestamp'],
+            'total_contracts': data.get('total_contracts', 0),
+            'strike_prices_count': len(data.get('strike_prices', [])),
+            'expiry_dates_count': len(data.get('expiry_timestamps', []))
+        })
+    
+    @staticmethod
+    def _write_feather(cache_file: str, cache_data: Dict):
+        """以 Feather(lz4) 保存：期权列表为列式表格，时间戳与统计信息写入元数据"""
+        data = cache_data['data']
+        has_table = FEATHER_TABLE_FIELD in data
+        metadata = {
+            **cache_data,
+            'data': {key: value for key, value in data.items() if key != FEATHER_TABLE_FIELD},
+            'has_table': has_table
+        }
+        table = pa.Table.from_pylist(data.get(FEATHER_TABLE_FIELD) or [])
+        table = table.replace_schema_metadata({
+            FEATHER_METADATA_KEY: orjson.dumps(metadata, option=orjson.OPT_SERIALIZE_NUMPY)
+        })
+        feather.write_feather(table, cache_file, compression='lz4')
+    
+    @staticmethod
+    def _read_feather(cache_file: str) -> Dict:
+        """读取 Feather 缓存（内存映射，数值列无需逐值解析）"""
+        table = feather.read_table(cache_file, memory_map=True)
+        cache_data = orjson.loads((table.schema.metadata or {})[FEATHER_METADATA_KEY])
+        if cache_data.pop('has_table', False):
+            cache_data['data'][FEATHER_TABLE_FIELD] = table.to_pylist()
+        return cache_data
+    
+    @classmethod
+    def _read_cache_file(cls, cache_file: str) -> Dict:
+        """读取缓存文件（格式由扩展名决定）"""
+        if cache_file.endswith('.feather'):
+            return cls._read_feather(cache_file)
+        
+        with open(cache_file, 'rb') as f:
+            raw = f.read()
+        
+        if not cache_file.endswith('.mpk'):
+            return orjson.loads(raw)
+        
+        length = int.from_bytes(raw[:MSGPACK_LENGTH_PREFIX], 'big')
+        payload = raw[MSGPACK_LENGTH_PREFIX:MSGPACK_LENGTH_PREFIX + length]
+        if len(payload) != length:
+            raise ValueError("缓存文件不完整")
+        return _MSGPACK_DECODER.decode(payload)
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _load_cache_file_cached(cache_file: str, mtime_ns: int) -> Dict:
+        """按 (文件, 修改时间) 缓存解析结果，同一进程内重复加载同一版本的文件只解析一次"""
+        return DataCache._read_cache_file(cache_file)
+    
+    def _read_cache(self, base_coin: str, data_type: str = 'options') -> Tuple[Optional[Dict], Optional[int]]:
+        """读取并解析缓存文件，返回 (解析结果, 修改时间ns)；文件缺失或损坏时返回 (None, None)
+        
+        load_from_file 与 get_cache_status 共用此方法，同一版本的文件只解析一次。
+        """
+        cache_file = self.get_cache_file_path(base_coin, data_type)
+        try:
+            mtime_ns = os.stat(cache_file).st_mtime_ns
+            return self._load_cache_file_cached(cache_file, mtime_ns), mtime_ns
+        except (orjson.JSONDecodeError, ValueError, KeyError, OSError):
+            return None, None
     
     def load_from_file(self, base_coin: str, data_type: str) -> Optional[Dict]:
         """从文件加载数据"""
-        cache_file = self.get_cache_file_path(base_coin, data_type)
-        
-        if not os.path.exists(cache_file):
+        cache_data, _ = self._read_cache(base_coin, data_type)
+        if cache_data is None:
             return None
             
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                
-            # 检查数据是否过期（1小时）
-            cache_time = cache_data.get('timestamp', 0)
-            if time.time() - cache_time > 3600:  # 1小时过期
-                return None
-                
-            return cache_data['data']
-        except (json.JSONDecodeError, KeyError, FileNotFoundError):
+        # 检查数据是否过期（1小时）
+        cache_time = cache_data.get('timestamp', 0)
+        if time.time() - cache_time > 3600:  # 1小时过期
             return None
+            
+        return cache_data.get('data')
     
     def refresh_option_data(self, base_coin: str = 'BTC') -> Dict:
         """刷新期权数据"""
         print(f"正在刷新 {base_coin} 期权数据...")
         
         try:
-            # 获取期权合约信息
-            instruments_result = self.api_client.get_option_chain(base_coin)
+            # 并发获取期权合约信息与价格数据
+            api_client = self.api_client_factory() if self.api_client_factory else self.api_client
+            instruments_result, tickers_result = api_client.get_option_snapshot(base_coin)
             if instruments_result.get('retCode') != 0:
-                raise Exception(f"获取期权合约失败: {instruments_result.get('retMsg')}")
+                return self._refresh_failed(base_coin, f"获取期权合约失败: {instruments_result.get('retMsg')}")
             
-            # 获取期权价格数据
-            tickers_result = self.api_client.get_option_tickers(base_coin=base_coin)
             if tickers_result.get('retCode') != 0:
-                raise Exception(f"获取期权价格失败: {tickers_result.get('retMsg')}")
+                return self._refresh_failed(base_coin, f"获取期权价格失败: {tickers_result.get('retMsg')}")
             
             # 处理合约数据
             instruments = instruments_result.get('result', {}).get('list', [])
@@ -82,67 +342,86 @@ def refresh_option_data(self, base_coin: str = 'BTC') -> Dict:
             # 创建ticker字典用于快速查找
             ticker_dict = {ticker['symbol']: ticker for ticker in tickers}
             
-            # 处理数据
-            processed_data = []
-            strike_prices = set()
-            expiry_timestamps = set()
+            # 解析合约基础字段，执行价格无法解析的合约跳过；合约数已知，按上限预分配后按下标写入
+            instrument_count = len(instruments)
+            valid_instruments = [None] * instrument_count
+            strike_array = np.empty(instrument_count, dtype=np.float64)
+            expiry_array = np.empty(instrument_count, dtype=np.int64)
+            valid_count = 0
             
             for instrument in instruments:
-                symbol = instrument.get('symbol', '')
-                
-                # 从symbol中解析执行价格
-                strike_price = 0
-                try:
-                    parts = symbol.split('-')
-                    if len(parts) >= 3:
-                        strike_price = float(parts[2])
-                        strike_prices.add(strike_price)
-                except (ValueError, IndexError):
+                # 合约代码基本不变，parse_strike 的缓存使再次刷新时只需解析新增合约
+                strike_price = parse_strike(instrument.get('symbol', ''))
+                if strike_price is None:
                     continue
                 
-                # 获取到期时间
-                expiry_time = instrument.get('deliveryTime')
-                if expiry_time:
-                    expiry_timestamps.add(int(expiry_time))
-                
-                # 获取对应的ticker数据
-                ticker = ticker_dict.get(symbol, {})
-                
-                option_data = {
-                    'symbol': symbol,
+                valid_instruments[valid_count] = instrument
+                strike_array[valid_count] = strike_price
+                expiry_array[valid_count] = int(instrument.get('deliveryTime') or 0)
+                valid_count += 1
+            
+            # 截去跳过的合约留下的空位
+            del valid_instruments[valid_count:]
+            strike_array = strike_array[:valid_count]
+            expiry_array = expiry_array[:valid_count]
+            
+            # 去重并排序执行价格与到期时间（未解析出执行价或缺少到期时间的记为0，不计入）
+            strike_prices = np.unique(strike_array[strike_array > 0]).tolist()
+            expiry_timestamps = np.unique(expiry_array[expiry_array > 0]).tolist()
+            
+            # 行情数值字段按列整体转换为float64，缺失或空值记为0
+            matched_tickers = [ticker_dict.get(instrument.get('symbol', ''), {}) for instrument in valid_instruments]
+            columns = {
+                field: np.array([ticker.get(key) or 0 for ticker in matched_tickers], dtype=np.float64)
+                for field, key in TICKER_NUMERIC_FIELDS
+            }
+            columns['iv'] *= 100
+            numeric_rows = zip(*(columns[field].tolist() for field, _ in TICKER_NUMERIC_FIELDS))
+            
+            processed_data = [
+                {
+                    'symbol': instrument.get('symbol', ''),
                     'strike_price': strike_price,
                     'option_type': instrument.get('optionsType', ''),
-                    'expiry_date': expiry_time,
+                    'expiry_date': instrument.get('deliveryTime'),
                     'status': instrument.get('status', ''),
                     'base_coin': instrument.get('baseCoin', ''),
                     'quote_coin': instrument.get('quoteCoin', ''),
-                    'bid_price': float(ticker.get('bid1Price', 0)),
-                    'ask_price': float(ticker.get('ask1Price', 0)),
-                    'mark_price': float(ticker.get('markPrice', 0)),
-                    'last_price': float(ticker.get('lastPrice', 0)),
-                    'volume_24h': float(ticker.get('volume24h', 0)),
-                    'open_interest': float(ticker.get('openInterest', 0)),
-                    'iv': float(ticker.get('markIv', 0)) * 100 if ticker.get('markIv') else 0,
-                    'delta': float(ticker.get('delta', 0)),
-                    'gamma': float(ticker.get('gamma', 0)),
-                    'theta': float(ticker.get('theta', 0)),
-                    'vega': float(ticker.get('vega', 0))
+                    **dict(zip(TICKER_NUMERIC_FIELD_NAMES, numeric_values))
                 }
-                
-                processed_data.append(option_data)
+                for instrument, strike_price, numeric_values in zip(valid_instruments, strike_array.tolist(), numeric_rows)
+            ]
             
             # 准备缓存数据
             cache_data = {
                 'options': processed_data,
-                'strike_prices': sorted(list(strike_prices)),
-                'expiry_timestamps': sorted(list(expiry_timestamps)),
+                'strike_prices': strike_prices,
+                'expiry_timestamps': expiry_timestamps,
                 'total_contracts': len(processed_data),
                 'refresh_time': datetime.now().isoformat()
             }
             
             # 保存到文件和内存
             self.save_to_file(cache_data, base_coin, 'options')
-            self.memory_cache[f"{base_coin}_options"] = cache_data
+            self.memory_cache[base_coin] = CachedSet(
+                options=processed_data,
+                strikes=strike_prices,
+                expiries=expiry_timestamps,
+                loaded_at=time.time()
+            )
+            
+            # 合约索引与列式数组在刷新时直接建好，查询时无需再遍历整份列表
+            self._symbol_index[base_coin] = (
+                processed_data,
+                {option['symbol']: option for option in processed_data}
+            )
+            self._array_cache[base_coin] = (processed_data, {
+                'expiry_ms': expiry_array,
+                'strike': strike_array,
+                'is_call': np.array([instrument.get('optionsType') == 'Call' for instrument in valid_instruments],
+                                    dtype=np.bool_),
+                **columns
+            })
             
             print(f"✅ {base_coin} 数据刷新完成:")
             print(f"   期权合约: {len(processed_data)} 个")
@@ -160,51 +439,102 @@ def refresh_option_data(self, base_coin: str = 'BTC') -> Dict:
                 }
             }
             
-        except Exception as e:
-            print(f"❌ 刷新 {base_coin} 数据失败: {e}")
-            return {
-                'success': False,
-                'message': f'刷新 {base_coin} 数据失败: {str(e)}'
-            }
+        except _REFRESH_ERRORS as e:
+            return self._refresh_failed(base_coin, e)
+    
+    @staticmethod
+    def _refresh_failed(base_coin: str, reason) -> Dict:
+        """输出并返回刷新失败结果"""
+        print(f"❌ 刷新 {base_coin} 数据失败: {reason}")
+        return {
+            'success': False,
+            'message': f'刷新 {base_coin} 数据失败: {reason}'
+        }
+    
+    def refresh_coins(self, coins: List[str] = None) -> List[Dict]:
+        """并发刷新多个币种的期权数据，结果顺序与 normalize_coins(coins) 一致"""
+        coins = normalize_coins(coins or ()) or list(SUPPORTED_COINS)
+        with ThreadPoolExecutor(max_workers=min(len(coins), MAX_REFRESH_WORKERS)) as executor:
+            return list(executor.map(self.refresh_option_data, coins))
+    
+    def _get_cached_set(self, base_coin: str) -> Optional[CachedSet]:
+        """获取币种的内存缓存，没有时从文件加载"""
+        cached = self.memory_cache.get(base_coin)
+        if cached is not None:
+            return cached
+        
+        cached_data = self.load_from_file(base_coin, 'options')
+        if not cached_data:
+            return None
+        
+        cached = CachedSet(
+            options=cached_data.get('options', []),
+            strikes=cached_data.get('strike_prices', []),
+            expiries=cached_data.get('expiry_timestamps', []),
+            loaded_at=time.time()
+        )
+        self.memory_cache[base_coin] = cached
+        return cached
     
     def get_cached_options(self, base_coin: str = 'BTC') -> List[Dict]:
         """获取缓存的期权数据"""
-        # 先尝试内存缓存
-        memory_key = f"{base_coin}_options"
-        if memory_key in self.memory_cache:
-            return self.memory_cache[memory_key]['options']
+        cached = self._get_cached_set(base_coin)
+        return cached.options if cached else []
+    
+    def get_cached_option(self, base_coin: str, symbol: str) -> Optional[Dict]:
+        """按合约代码查找缓存的期权（索引随数据刷新自动重建）"""
+        options = self.get_cached_options(base_coin)
         
-        # 再尝试文件缓存
-        cached_data = self.load_from_file(base_coin, 'options')
-        if cached_data:
-            self.memory_cache[memory_key] = cached_data
-            return cached_data['options']
+        cached = self._symbol_index.get(base_coin)
+        if cached is None or cached[0] is not options:
+            cached = (options, {opt.get('symbol'): opt for opt in options})
+            self._symbol_index[base_coin] = cached
         
-        return []
+        return cached[1].get(symbol)
     
-    def get_cached_strike_prices(self, base_coin: str = 'BTC') -> List[float]:
-        """获取缓存的执行价格"""
-        memory_key = f"{base_coin}_options"
-        if memory_key in self.memory_cache:
-            return self.memory_cache[memory_key]['strike_prices']
+    def get_option_arrays(self, base_coin: str = 'BTC') -> Dict[str, np.ndarray]:
+        """获取缓存期权的列式数组（下标与 get_cached_options 返回的列表一致）
         
-        cached_data = self.load_from_file(base_coin, 'options')
-        if cached_data:
-            return cached_data['strike_prices']
+        expiry_ms: 到期时间戳(毫秒), strike: 执行价, is_call: 是否看涨。
+        同一份期权列表只构建一次，数据刷新后自动重建。
+        """
+        options = self.get_cached_options(base_coin)
         
-        return []
+        cached = self._array_cache.get(base_coin)
+        if cached is not None and cached[0] is options:
+            return cached[1]
+        
+        count = len(options)
+        arrays = {
+            'expiry_ms': np.fromiter((int(opt.get('expiry_date') or 0) for opt in options), dtype=np.int64, count=count),
+            'strike': np.fromiter((opt.get('strike_price') or 0 for opt in options), dtype=np.float64, count=count),
+            'is_call': np.fromiter((opt.get('option_type') == 'Call' for opt in options), dtype=np.bool_, count=count)
+        }
+        self._array_cache[base_coin] = (options, arrays)
+        return arrays
+    
+    def get_option_column(self, base_coin: str, field: str) -> np.ndarray:
+        """获取单个数值字段的列式数组（如 mark_price、iv），下标与 get_cached_options 一致
+        
+        刷新时已按列计算的行情字段直接复用，其余字段首次访问时构建。
+        """
+        arrays = self.get_option_arrays(base_coin)
+        column = arrays.get(field)
+        if column is None:
+            options = self._array_cache[base_coin][0]
+            column = np.fromiter((opt.get(field) or 0 for opt in options), dtype=np.float64, count=len(options))
+            arrays[field] = column
+        return column
+    
+    def get_cached_strike_prices(self, base_coin: str = 'BTC') -> List[float]:
+        """获取缓存的执行价格"""
+        cached = self._get_cached_set(base_coin)
+        return cached.strikes if cached else []
     
     def get_cached_expiry_dates(self, base_coin: str = 'BTC') -> List[int]:
         """获取缓存的到期时间戳"""
-        memory_key = f"{base_coin}_options"
-        if memory_key in self.memory_cache:
-            return self.memory_cache[memory_key]['expiry_timestamps']
-        
-        cached_data = self.load_from_file(base_coin, 'options')
-        if cached_data:
-            return cached_data['expiry_timestamps']
-        
-        return []
+        cached = self._get_cached_set(base_coin)
+        return cached.expiries if cached else []
     
     def get_cache_status(self, base_coin: str = 'BTC') -> Dict:
         """获取缓存状态"""
@@ -216,51 +546,70 @@ def get_cache_status(self, base_coin: str = 'BTC') -> Dict:
                 'message': '暂无缓存数据，请点击刷新获取最新数据'
             }
         
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            cache_time = cache_data.get('timestamp', 0)
-            cache_datetime = datetime.fromtimestamp(cache_time)
-            is_expired = time.time() - cache_time > 3600
-            
-            stats = cache_data.get('data', {})
-            
-            return {
-                'cached': True,
-                'cache_time': cache_datetime.strftime('%Y-%m-%d %H:%M:%S'),
-                'is_expired': is_expired,
+        meta = self._read_meta(base_coin, 'options', cache_file)
+        if meta is None:
+            # 没有可用的统计文件（如旧版本写入的缓存），回退为解析整个缓存（结果可供随后的加载复用）
+            cache_data, _ = self._read_cache(base_coin, 'options')
+            if not isinstance(cache_data, dict) or not isinstance(cache_data.get('data'), dict):
+                return self._corrupt_cache_status()
+            stats = cache_data['data']
+            meta = {
+                'timestamp': cache_data.get('timestamp', 0),
                 'total_contracts': stats.get('total_contracts', 0),
                 'strike_prices_count': len(stats.get('strike_prices', [])),
-                'expiry_dates_count': len(stats.get('expiry_timestamps', [])),
-                'message': '数据已过期，建议刷新' if is_expired else '数据是最新的'
-            }
-            
-        except Exception:
-            return {
-                'cached': False,
-                'message': '缓存数据损坏，请重新刷新'
+                'expiry_dates_count': len(stats.get('expiry_timestamps', []))
             }
+        
+        cache_time = meta.get('timestamp', 0)
+        try:
+            cache_datetime = datetime.fromtimestamp(cache_time)
+        except (TypeError, ValueError, OverflowError, OSError):
+            return self._corrupt_cache_status()
+        is_expired = time.time() - cache_time > 3600
+        
+        return {
+            'cached': True,
+            'cache_time': cache_datetime.strftime('%Y-%m-%d %H:%M:%S'),
+            'is_expired': is_expired,
+            'total_contracts': meta.get('total_contracts', 0),
+            'strike_prices_count': meta.get('strike_prices_count', 0),
+            'expiry_dates_count': meta.get('expiry_dates_count', 0),
+            'message': '数据已过期，建议刷新' if is_expired else '数据是最新的'
+        }
+    
+    @staticmethod
+    def _corrupt_cache_status() -> Dict:
+        """缓存文件损坏时的状态"""
+        return {
+            'cached': False,
+            'message': '缓存数据损坏，请重新刷新'
+        }
     
     def clear_cache(self, base_coin: str = None):
         """清除缓存"""
         if base_coin:
             # 清除特定币种的缓存
-            cache_file = self.get_cache_file_path(base_coin, 'options')
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
+            for cache_file in (self.get_cache_file_path(base_coin, 'options'),
+                               self.get_meta_file_path(base_coin, 'options')):
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
             
-            memory_key = f"{base_coin}_options"
-            if memory_key in self.memory_cache:
-                del self.memory_cache[memory_key]
+            self.memory_cache.pop(base_coin, None)
+            self._array_cache.pop(base_coin, None)
+            self._symbol_index.pop(base_coin, None)
+            self._load_cache_file_cached.cache_clear()
         else:
             # 清除所有缓存
             if os.path.exists(self.cache_dir):
-                for file in os.listdir(self.cache_dir):
-                    if file.endswith('.json'):
-                        os.remove(os.path.join(self.cache_dir, file))
+                with os.scandir(self.cache_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(CACHE_FILE_SUFFIXES) and entry.is_file():
+                            os.remove(entry.path)
             
             self.memory_cache.clear()
+            self._load_cache_file_cached.cache_clear()
+            self._array_cache.clear()
+            self._symbol_index.clear()
 
 # 创建全局缓存实例
 data_cache = DataCache()
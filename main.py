@@ -7,15 +7,15 @@
 3. 查看钱包余额
 """
 
+import sys
+from datetime import datetime
 import click
 from colorama import Fore, Style, init
-from bybit_api import BybitAPI
-from option_chain import OptionChain
-from positions import PositionManager
-from trading import OptionTrader
-from option_calculator import calculate_option_price_scenario
 from config import Config
 
+# 较重的业务模块（网络客户端、numpy/scipy 等）在各命令内按需导入，
+# 使 --help、config-check 等命令无需承担这些导入开销
+
 # 初始化colorama
 init()
 
@@ -28,18 +28,26 @@ def cli(ctx, testnet):
     # 确保上下文对象存在
     ctx.ensure_object(dict)
     
-    # 初始化API客户端
-    api_client = BybitAPI()
-    ctx.obj['api'] = api_client
     ctx.obj['testnet'] = testnet
     
     if testnet:
         print(f"{Fore.YELLOW}使用测试网环境{Style.RESET_ALL}")
-    
-    # 检查API配置
-    if not api_client.api_key or not api_client.api_secret:
-        print(f"{Fore.YELLOW}警告: 未配置API密钥，部分功能可能无法使用{Style.RESET_ALL}")
-        print("请设置环境变量 BYBIT_API_KEY 和 BYBIT_API_SECRET")
+
+
+def _get_api(ctx):
+    """获取API客户端（首次使用时才导入bybit_api并创建，纯本地命令不承担网络库导入开销）"""
+    api_client = ctx.obj.get('api')
+    if api_client is None:
+        from bybit_api import BybitAPI
+        
+        api_client = BybitAPI()
+        ctx.obj['api'] = api_client
+        
+        # 检查API配置
+        if not api_client.api_key or not api_client.api_secret:
+            print(f"{Fore.YELLOW}警告: 未配置API密钥，部分功能可能无法使用{Style.RESET_ALL}")
+            print("请设置环境变量 BYBIT_API_KEY 和 BYBIT_API_SECRET")
+    return api_client
 
 
 @cli.command()
@@ -51,7 +59,8 @@ def cli(ctx, testnet):
 @click.pass_context
 def chain(ctx, base_coin, expiry, strike_min, strike_max, atm_only):
     """查看期权链"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from option_chain import OptionChain
     option_chain = OptionChain(api)
     
     print(f"{Fore.CYAN}正在查询 {base_coin} 期权链...{Style.RESET_ALL}")
@@ -83,7 +92,8 @@ def chain(ctx, base_coin, expiry, strike_min, strike_max, atm_only):
 @click.pass_context
 def positions(ctx, symbol):
     """查看持仓"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from positions import PositionManager
     position_manager = PositionManager(api)
     
     print(f"{Fore.CYAN}正在查询持仓信息...{Style.RESET_ALL}")
@@ -97,7 +107,8 @@ def positions(ctx, symbol):
 @click.pass_context
 def wallet(ctx):
     """查看钱包余额"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from positions import PositionManager
     position_manager = PositionManager(api)
     
     print(f"{Fore.CYAN}正在查询钱包信息...{Style.RESET_ALL}")
@@ -112,7 +123,8 @@ def wallet(ctx):
 @click.pass_context
 def expiries(ctx, base_coin):
     """查看可用的到期日"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from option_chain import OptionChain
     option_chain = OptionChain(api)
     
     print(f"{Fore.CYAN}正在查询 {base_coin} 可用到期日...{Style.RESET_ALL}")
@@ -131,7 +143,8 @@ def expiries(ctx, base_coin):
 @click.pass_context
 def summary(ctx):
     """显示账户摘要"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from positions import PositionManager
     position_manager = PositionManager(api)
     
     print(f"{Fore.CYAN}正在生成账户摘要...{Style.RESET_ALL}")
@@ -159,6 +172,28 @@ def summary(ctx):
         print(f"可用余额: {wallet_info['total_available_balance']:.4f} USD")
 
 
+@cli.command()
+@click.option('--base-coin', '-b', multiple=True, help='要刷新的币种，可重复指定（默认 BTC 和 ETH）')
+@click.pass_context
+def refresh(ctx, base_coin):
+    """刷新本地期权数据缓存（多个币种并发拉取）"""
+    from data_cache import DataCache, SUPPORTED_COINS, normalize_coins
+    
+    try:
+        coins = normalize_coins(base_coin) or list(SUPPORTED_COINS)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--base-coin')
+    
+    cache = DataCache()
+    cache.api_client = _get_api(ctx)
+    
+    print(f"{Fore.CYAN}正在刷新 {', '.join(coins)} 期权数据...{Style.RESET_ALL}")
+    results = cache.refresh_coins(coins)
+    
+    if not all(result.get('success') for result in results):
+        sys.exit(1)
+
+
 @cli.command()
 @click.pass_context
 def config_check(ctx):
@@ -182,7 +217,7 @@ def config_check(ctx):
 @click.pass_context
 def api_info(ctx):
     """查看API密钥信息和权限"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
     
     print(f"{Fore.CYAN}正在查询API密钥信息...{Style.RESET_ALL}")
     
@@ -223,7 +258,8 @@ def api_info(ctx):
 @click.pass_context
 def buy(ctx, symbol, quantity, price, confirm):
     """买入期权"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from trading import OptionTrader
     trader = OptionTrader(api)
     
     order_type = "Limit" if price else "Market"
@@ -254,7 +290,8 @@ def buy(ctx, symbol, quantity, price, confirm):
 @click.pass_context
 def sell(ctx, symbol, quantity, price, confirm):
     """卖出期权"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
+    from trading import OptionTrader
     trader = OptionTrader(api)
     
     order_type = "Limit" if price else "Market"
@@ -283,7 +320,7 @@ def sell(ctx, symbol, quantity, price, confirm):
 @click.pass_context
 def orders(ctx, symbol, limit):
     """查看订单历史"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
     
     print(f"{Fore.CYAN}正在查询订单历史...{Style.RESET_ALL}")
     
@@ -293,7 +330,8 @@ def orders(ctx, symbol, limit):
         orders_list = orders_data.get('result', {}).get('list', [])
         
         if orders_list:
-            print(f"\n{Fore.CYAN}=== 订单历史 ==={Style.RESET_ALL}")
+            # 整段输出拼好后一次写出，避免逐行 print 的多次写调用
+            lines = [f"\n{Fore.CYAN}=== 订单历史 ==={Style.RESET_ALL}"]
             
             for order in orders_list:
                 status = order.get('orderStatus', '')
@@ -305,12 +343,7 @@ def orders(ctx, symbol, limit):
                 created_time = order.get('createdTime', '')
                 
                 # 格式化时间
-                if created_time:
-                    import datetime
-                    dt = datetime.datetime.fromtimestamp(int(created_time) / 1000)
-                    time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    time_str = 'N/A'
+                time_str = datetime.fromtimestamp(int(created_time) / 1000).strftime('%Y-%m-%d %H:%M:%S') if created_time else 'N/A'
                 
                 # 根据状态设置颜色
                 if status == 'Filled':
@@ -322,14 +355,18 @@ def orders(ctx, symbol, limit):
                 
                 side_color = Fore.GREEN if side == 'Buy' else Fore.RED
                 
-                print(f"\n合约: {symbol}")
-                print(f"方向: {side_color}{side}{Style.RESET_ALL}")
-                print(f"数量: {qty}")
-                print(f"委托价: {price}")
-                print(f"成交价: {avg_price}")
-                print(f"状态: {status_color}{status}{Style.RESET_ALL}")
-                print(f"时间: {time_str}")
-                print("-" * 50)
+                lines.extend((
+                    f"\n合约: {symbol}",
+                    f"方向: {side_color}{side}{Style.RESET_ALL}",
+                    f"数量: {qty}",
+                    f"委托价: {price}",
+                    f"成交价: {avg_price}",
+                    f"状态: {status_color}{status}{Style.RESET_ALL}",
+                    f"时间: {time_str}",
+                    "-" * 50
+                ))
+            
+            sys.stdout.write("\n".join(lines) + "\n")
         else:
             print("暂无订单历史")
     else:
@@ -341,7 +378,7 @@ def orders(ctx, symbol, limit):
 @click.pass_context
 def greeks(ctx, symbol):
     """查看特定期权的希腊字母数据"""
-    api = ctx.obj['api']
+    api = _get_api(ctx)
     
     print(f"{Fore.CYAN}正在查询 {symbol} 的希腊字母数据...{Style.RESET_ALL}")
     
@@ -354,52 +391,54 @@ def greeks(ctx, symbol):
         if tickers:
             ticker = tickers[0]
             
-            print(f"\n{Fore.GREEN}=== {symbol} 详细数据 ==={Style.RESET_ALL}")
+            lines = [f"\n{Fore.GREEN}=== {symbol} 详细数据 ==={Style.RESET_ALL}"]
             
             # 基础价格信息
-            print(f"\n{Fore.CYAN}价格信息:{Style.RESET_ALL}")
-            print(f"标记价格: {float(ticker.get('markPrice', 0)):.4f}")
-            print(f"买一价: {float(ticker.get('bid1Price', 0)):.4f}")
-            print(f"卖一价: {float(ticker.get('ask1Price', 0)):.4f}")
-            print(f"最新价: {float(ticker.get('lastPrice', 0)):.4f}")
+            lines.append(f"\n{Fore.CYAN}价格信息:{Style.RESET_ALL}")
+            lines.append(f"标记价格: {float(ticker.get('markPrice', 0)):.4f}")
+            lines.append(f"买一价: {float(ticker.get('bid1Price', 0)):.4f}")
+            lines.append(f"卖一价: {float(ticker.get('ask1Price', 0)):.4f}")
+            lines.append(f"最新价: {float(ticker.get('lastPrice', 0)):.4f}")
             
             # 成交和持仓信息
-            print(f"\n{Fore.CYAN}市场数据:{Style.RESET_ALL}")
-            print(f"24h成交量: {float(ticker.get('volume24h', 0)):.2f}")
-            print(f"持仓量: {float(ticker.get('openInterest', 0)):.2f}")
-            print(f"24h涨跌幅: {float(ticker.get('price24hPcnt', 0)) * 100:.2f}%")
+            lines.append(f"\n{Fore.CYAN}市场数据:{Style.RESET_ALL}")
+            lines.append(f"24h成交量: {float(ticker.get('volume24h', 0)):.2f}")
+            lines.append(f"持仓量: {float(ticker.get('openInterest', 0)):.2f}")
+            lines.append(f"24h涨跌幅: {float(ticker.get('price24hPcnt', 0)) * 100:.2f}%")
             
             # 希腊字母
-            print(f"\n{Fore.YELLOW}=== 希腊字母 ==={Style.RESET_ALL}")
+            lines.append(f"\n{Fore.YELLOW}=== 希腊字母 ==={Style.RESET_ALL}")
             delta = float(ticker.get('delta', 0))
             gamma = float(ticker.get('gamma', 0))
             theta = float(ticker.get('theta', 0))
             vega = float(ticker.get('vega', 0))
             iv = float(ticker.get('markIv', 0)) * 100 if ticker.get('markIv') else 0
             
-            print(f"Delta: {delta:.6f}")
-            print(f"Gamma: {gamma:.6f}")
-            print(f"Theta: {theta:.6f}")
-            print(f"Vega: {vega:.6f}")
-            print(f"隐含波动率: {iv:.2f}%")
+            lines.append(f"Delta: {delta:.6f}")
+            lines.append(f"Gamma: {gamma:.6f}")
+            lines.append(f"Theta: {theta:.6f}")
+            lines.append(f"Vega: {vega:.6f}")
+            lines.append(f"隐含波动率: {iv:.2f}%")
             
             # 希腊字母解释
-            print(f"\n{Fore.BLUE}=== 希腊字母含义 ==={Style.RESET_ALL}")
-            print(f"Delta: 标的价格变动1美元时，期权价格变动约 {abs(delta):.6f} 美元")
+            lines.append(f"\n{Fore.BLUE}=== 希腊字母含义 ==={Style.RESET_ALL}")
+            lines.append(f"Delta: 标的价格变动1美元时，期权价格变动约 {abs(delta):.6f} 美元")
             if delta > 0:
-                print("       正Delta表示看涨期权，标的上涨期权价格上涨")
+                lines.append("       正Delta表示看涨期权，标的上涨期权价格上涨")
             else:
-                print("       负Delta表示看跌期权，标的上涨期权价格下跌")
+                lines.append("       负Delta表示看跌期权，标的上涨期权价格下跌")
                 
-            print(f"Gamma: Delta的变化率，标的价格变动1美元时，Delta变动 {gamma:.6f}")
-            print(f"Theta: 时间衰减，每天期权价格衰减约 {abs(theta):.4f} 美元")
-            print(f"Vega: 波动率敏感性，隐含波动率变动1%时，期权价格变动 {vega:.4f} 美元")
+            lines.append(f"Gamma: Delta的变化率，标的价格变动1美元时，Delta变动 {gamma:.6f}")
+            lines.append(f"Theta: 时间衰减，每天期权价格衰减约 {abs(theta):.4f} 美元")
+            lines.append(f"Vega: 波动率敏感性，隐含波动率变动1%时，期权价格变动 {vega:.4f} 美元")
             
             # 风险提示
             if abs(delta) < 0.1:
-                print(f"\n{Fore.YELLOW}⚠️  低Delta值表示该期权对标的价格变动不敏感{Style.RESET_ALL}")
+                lines.append(f"\n{Fore.YELLOW}⚠️  低Delta值表示该期权对标的价格变动不敏感{Style.RESET_ALL}")
             if abs(theta) > 10:
-                print(f"\n{Fore.RED}⚠️  高Theta值表示时间衰减较快，需注意时间风险{Style.RESET_ALL}")
+                lines.append(f"\n{Fore.RED}⚠️  高Theta值表示时间衰减较快，需注意时间风险{Style.RESET_ALL}")
+            
+            sys.stdout.write("\n".join(lines) + "\n")
             
         else:
             print("未找到该合约的数据")
@@ -415,7 +454,9 @@ def greeks(ctx, symbol):
 @click.pass_context
 def scenario(ctx, symbol, target_price, current_btc, today):
     """期权价格情景分析"""
-    api = ctx.obj['api']
+    from option_calculator import calculate_option_price_scenario
+    
+    api = _get_api(ctx)
     
     print(f"{Fore.CYAN}正在进行期权价格情景分析...{Style.RESET_ALL}")
     
@@ -445,14 +486,15 @@ def scenario(ctx, symbol, target_price, current_btc, today):
             
             if result:
                 # 为您的持仓计算盈亏
-                print(f"\n💼 持仓影响分析:")
-                print(f"   您当前净空头: 1.2手")
+                lines = [f"\n💼 持仓影响分析:"]
+                lines.append(f"   您当前净空头: 1.2手")
                 position_pnl = -1.2 * result['price_change']  # 空头，价格上涨是亏损
-                print(f"   持仓盈亏变化: ${position_pnl:+.2f}")
+                lines.append(f"   持仓盈亏变化: ${position_pnl:+.2f}")
                 if position_pnl > 0:
-                    print(f"   ✅ 空头持仓将获利")
+                    lines.append(f"   ✅ 空头持仓将获利")
                 else:
-                    print(f"   ❌ 空头持仓将亏损")
+                    lines.append(f"   ❌ 空头持仓将亏损")
+                sys.stdout.write("\n".join(lines) + "\n")
             
         else:
             print("未找到该合约的数据")
@@ -2,17 +2,150 @@
 期权定价计算器
 使用 Black-Scholes 模型估算期权价格
 """
+import calendar
 import math
-from scipy.stats import norm
-from datetime import datetime, timedelta
+import time
+from functools import lru_cache
 from typing import Dict, Optional
+import numpy as np
+from scipy.special import ndtr
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 标准正态分布概率密度函数的系数 1/√(2π)
+INV_SQRT_2PI = 0.3989422804014327
+INV_SQRT_2 = 0.7071067811865476
+
+# 定价时需要计算的希腊字母（按位组合）；价格、d1、d2 总是计算
+G_PRICE = 1
+G_DELTA = 2
+G_GAMMA = 4
+G_THETA = 8
+G_VEGA = 16
+G_ALL = G_PRICE | G_DELTA | G_GAMMA | G_THETA | G_VEGA
+
+
+def _bs_call_kernel(S: float, K: float, T: float, r: float, sigma: float, greeks: int) -> tuple:
+    """
+    单个看涨期权的 Black-Scholes 计算核心，安装 numba 时编译为机器码
+    
+    只使用 math 模块（nopython 模式不能调用 scipy），正态分布CDF用 erfc 计算以保证尾部精度；
+    返回 (price, delta, gamma, theta, vega, d1, d2)，greeks 未请求的 gamma/theta/vega 为0
+    """
+    sqrt_T = math.sqrt(T)
+    sigma_sqrt_T = sigma * sqrt_T
+    discounted_K = K * math.exp(-r * T)
+    
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+    
+    N_d1 = 0.5 * math.erfc(-d1 * INV_SQRT_2)
+    N_d2 = 0.5 * math.erfc(-d2 * INV_SQRT_2)
+    call_price = S * N_d1 - discounted_K * N_d2
+    
+    gamma = 0.0
+    theta = 0.0
+    vega = 0.0
+    if greeks & (G_GAMMA | G_THETA | G_VEGA):
+        phi_d1 = math.exp(-0.5 * d1 * d1) * INV_SQRT_2PI
+        if greeks & G_GAMMA:
+            gamma = phi_d1 / (S * sigma_sqrt_T)
+        if greeks & G_THETA:
+            theta = -(S * phi_d1 * sigma / (2 * sqrt_T) + r * discounted_K * N_d2) / 365  # 转换为每日
+        if greeks & G_VEGA:
+            vega = S * phi_d1 * sqrt_T / 100  # 除以100得到1%变化的影响
+    
+    return max(call_price, 0.0), N_d1, gamma, theta, vega, d1, d2
+
+
+if NUMBA_AVAILABLE:
+    _bs_call_kernel = njit(cache=True)(_bs_call_kernel)
+
+# 相同参数的定价结果（如重复展示的单合约定价）直接复用；
+# 隐含波动率迭代每轮的sigma都是一次性的，直接调用 _bs_call_kernel，不经过缓存
+_bs_call_cached = lru_cache(maxsize=4096)(_bs_call_kernel)
+
+# 月份缩写
+MONTH_MAP = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
+}
+
+
+SECONDS_PER_YEAR = 365.25 * 86400.0
+
+
+@lru_cache(maxsize=256)
+def _parse_expiry_timestamp(expiry_date_str: str) -> int:
+    """解析到期日期为Unix时间戳（秒），格式如 "31OCT25" 或 "3OCT25"；同一到期日只解析一次"""
+    # 从尾部切片：年份和月份定长，日期可能是一位数
+    day = int(expiry_date_str[:-5])
+    month = MONTH_MAP[expiry_date_str[-5:-2]]
+    year = 2000 + int(expiry_date_str[-2:])
+    # timegm 会把越界日期顺延到下月（如 31FEB25），需先校验
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        raise ValueError(f"无效的到期日期: {expiry_date_str}")
+    
+    return calendar.timegm((year, month, day, 8, 0, 0))  # Bybit期权在UTC 8点交割
 
 
 class OptionCalculator:
     """期权定价计算器"""
     
     @staticmethod
-    def black_scholes_call(S: float, K: float, T: float, r: float, sigma: float) -> Dict[str, float]:
+    def black_scholes_call_vec(S, K, T, r, sigma, greeks: int = G_ALL) -> Dict[str, np.ndarray]:
+        """
+        向量化的 Black-Scholes 看涨期权定价
+        
+        参数可为标量或 numpy 数组，按广播规则批量计算（如整条期权链或多个波动率情景）；
+        d1/d2、N(d1)/N(d2)、φ(d1) 只计算一次，供价格和各希腊字母复用
+        
+        返回:
+        与 black_scholes_call 字段相同、值为数组的字典
+        """
+        S = np.asarray(S, dtype=np.float64)
+        K = np.asarray(K, dtype=np.float64)
+        T = np.asarray(T, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+        
+        sqrt_T = np.sqrt(T)
+        sigma_sqrt_T = sigma * sqrt_T
+        discounted_K = K * np.exp(-r * T)
+        
+        # 计算 d1 和 d2
+        d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / sigma_sqrt_T
+        d2 = d1 - sigma_sqrt_T
+        
+        # 标准正态分布累积分布函数
+        N_d1 = ndtr(d1)
+        N_d2 = ndtr(d2)
+        
+        # 期权价格
+        call_price = S * N_d1 - discounted_K * N_d2
+        
+        result = {'price': np.maximum(call_price, 0)}  # 期权价格不能为负
+        if greeks & G_DELTA:
+            result['delta'] = N_d1
+        if greeks & (G_GAMMA | G_THETA | G_VEGA):
+            # 标准正态分布概率密度函数
+            phi_d1 = np.exp(-0.5 * d1 * d1) * INV_SQRT_2PI
+            if greeks & G_GAMMA:
+                result['gamma'] = phi_d1 / (S * sigma_sqrt_T)
+            if greeks & G_THETA:
+                result['theta'] = -(S * phi_d1 * sigma / (2 * sqrt_T) + r * discounted_K * N_d2) / 365  # 转换为每日
+            if greeks & G_VEGA:
+                result['vega'] = S * phi_d1 * sqrt_T / 100  # 除以100得到1%变化的影响
+        result['d1'] = d1
+        result['d2'] = d2
+        return result
+    
+    @staticmethod
+    def black_scholes_call(S: float, K: float, T: float, r: float, sigma: float,
+                           greeks: int = G_ALL) -> Dict[str, float]:
         """
         Black-Scholes 看涨期权定价公式
         
@@ -22,69 +155,74 @@ def black_scholes_call(S: float, K: float, T: float, r: float, sigma: float) ->
         T: 到期时间（年）
         r: 无风险利率
         sigma: 波动率
+        greeks: 需要的希腊字母（G_* 按位组合），默认全部
         
         返回:
-        包含期权价格和希腊字母的字典
+        包含期权价格、所请求希腊字母及 d1、d2 的字典
         """
-        # 计算 d1 和 d2
-        d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        
-        # 标准正态分布累积分布函数
-        N_d1 = norm.cdf(d1)
-        N_d2 = norm.cdf(d2)
+        # 单个合约走标量计算核心，避免0维数组的额外开销
+        price, delta, gamma, theta, vega, d1, d2 = _bs_call_cached(
+            float(S), float(K), float(T), float(r), float(sigma), greeks
+        )
         
-        # 标准正态分布概率密度函数
-        phi_d1 = norm.pdf(d1)
+        result = {'price': price}  # 期权价格不能为负
+        if greeks & G_DELTA:
+            result['delta'] = delta
+        if greeks & G_GAMMA:
+            result['gamma'] = gamma
+        if greeks & G_THETA:
+            result['theta'] = theta
+        if greeks & G_VEGA:
+            result['vega'] = vega
+        result['d1'] = d1
+        result['d2'] = d2
+        return result
+    
+    @staticmethod
+    def black_scholes_put(S: float, K: float, T: float, r: float, sigma: float,
+                          greeks: int = G_ALL) -> Dict[str, float]:
+        """
+        Black-Scholes 看跌期权定价公式（参数与返回字段同 black_scholes_call）
         
-        # 期权价格
-        call_price = S * N_d1 - K * math.exp(-r * T) * N_d2
+        价格直接由 N(-d1)、N(-d2) 计算，不经过「看涨价格 - S + K·e^(-rT)」的大数相减
+        """
+        call = OptionCalculator.black_scholes_call(S, K, T, r, sigma, greeks & ~G_DELTA)
+        d1 = call['d1']
+        d2 = call['d2']
+        discounted_K = K * math.exp(-r * T)
         
-        # 希腊字母
-        delta = N_d1
-        gamma = phi_d1 / (S * sigma * math.sqrt(T))
-        theta = -(S * phi_d1 * sigma / (2 * math.sqrt(T)) + 
-                 r * K * math.exp(-r * T) * N_d2) / 365  # 转换为每日
-        vega = S * phi_d1 * math.sqrt(T) / 100  # 除以100得到1%变化的影响
+        # N(-x) = erfc(x/√2)/2
+        N_minus_d1 = 0.5 * math.erfc(d1 * INV_SQRT_2)
+        N_minus_d2 = 0.5 * math.erfc(d2 * INV_SQRT_2)
+        put_price = discounted_K * N_minus_d2 - S * N_minus_d1
         
-        return {
-            'price': max(call_price, 0),  # 期权价格不能为负
-            'delta': delta,
-            'gamma': gamma,
-            'theta': theta,
-            'vega': vega,
-            'd1': d1,
-            'd2': d2
-        }
+        result = {'price': max(put_price, 0)}  # 期权价格不能为负
+        if greeks & G_DELTA:
+            result['delta'] = -N_minus_d1
+        if greeks & G_GAMMA:
+            result['gamma'] = call['gamma']
+        if greeks & G_THETA:
+            result['theta'] = call['theta'] + r * discounted_K / 365
+        if greeks & G_VEGA:
+            result['vega'] = call['vega']
+        result['d1'] = d1
+        result['d2'] = d2
+        return result
     
     @staticmethod
-    def calculate_time_to_expiry(expiry_date_str: str) -> float:
-        """计算到期时间（年）"""
-        # 解析到期日期，格式如 "31OCT25"
+    def calculate_time_to_expiry(expiry_date_str: str, now_ts: float = None) -> float:
+        """计算到期时间（年），now_ts 为当前Unix时间戳，批量计算时可传入同一时刻"""
         try:
-            # 转换月份缩写
-            month_map = {
-                'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
-                'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
-            }
-            
-            day = int(expiry_date_str[:2])
-            month_str = expiry_date_str[2:5]
-            year = 2000 + int(expiry_date_str[5:7])
-            
-            month = month_map[month_str]
-            
-            expiry_date = datetime(year, month, day, 8, 0)  # 假设8点到期
-            current_date = datetime.now()
-            
-            time_diff = expiry_date - current_date
-            time_to_expiry = time_diff.total_seconds() / (365.25 * 24 * 3600)
-            
-            return max(time_to_expiry, 0)  # 不能为负
-            
-        except:
+            # 到期日解析结果已缓存，只有当前时间每次重新取，结果不会过时
+            expiry_ts = _parse_expiry_timestamp(expiry_date_str)
+        except (KeyError, ValueError, IndexError):
             # 如果解析失败，返回默认值
             return 0.1
+        
+        if now_ts is None:
+            now_ts = time.time()
+        
+        return max((expiry_ts - now_ts) / SECONDS_PER_YEAR, 0.0)  # 不能为负
     
     @staticmethod
     def implied_volatility_from_current_data(current_price: float, S: float, K: float, 
@@ -93,21 +231,33 @@ def implied_volatility_from_current_data(current_price: float, S: float, K: floa
         从当前期权价格反推隐含波动率
         使用牛顿-拉夫逊方法
         """
-        # 初始猜测
-        sigma = 0.3
+        # 初始猜测取价格对波动率的拐点（vomma为零处），从这里出发的牛顿迭代对看涨期权单调收敛，
+        # 深度实值/虚值合约也不会在vega趋近0的区域震荡
+        sigma = max(math.sqrt(abs(2.0 / T * (math.log(S / K) + r * T))), 0.05)
         tolerance = 1e-6
         max_iterations = 100
         
+        # 实值看涨期权的价格几乎全是内在价值，时间价值淹没在大数里；
+        # 按看跌-看涨平价换成同执行价的虚值看跌期权求解，两者隐含波动率相同
+        S, K, T, r = float(S), float(K), float(T), float(r)
+        discounted_K = K * math.exp(-r * T)
+        use_put = S > discounted_K
+        target_price = current_price - S + discounted_K if use_put else current_price
+        
         for i in range(max_iterations):
-            # 计算当前sigma下的期权价格
-            bs_result = OptionCalculator.black_scholes_call(S, K, T, r, sigma)
-            price_diff = bs_result['price'] - current_price
+            # 计算当前sigma下的期权价格（直接调用计算核心，一次性的sigma不进入定价缓存）
+            price, _, _, _, vega, d1, d2 = _bs_call_kernel(S, K, T, r, sigma, G_PRICE | G_VEGA)
+            if use_put:
+                # 看跌价格与 black_scholes_put 相同：K·e^(-rT)·N(-d2) - S·N(-d1)，vega与看涨相同
+                price = max(discounted_K * 0.5 * math.erfc(d2 * INV_SQRT_2)
+                            - S * 0.5 * math.erfc(d1 * INV_SQRT_2), 0)
+            price_diff = price - target_price
             
             if abs(price_diff) < tolerance:
                 return sigma
             
             # Vega (价格对波动率的导数)
-            vega = bs_result['vega'] * 100  # 转换回原始单位
+            vega = vega * 100  # 转换回原始单位
             
             if abs(vega) < tolerance:
                 break
@@ -119,6 +269,57 @@ def implied_volatility_from_current_data(current_price: float, S: float, K: floa
             sigma = max(0.01, min(sigma, 5.0))
         
         return sigma
+    
+    @staticmethod
+    def implied_volatility_vec(prices, S, K, T, r: float = 0.05) -> np.ndarray:
+        """
+        批量反推隐含波动率（向量化的牛顿-拉夫逊方法）
+        
+        参数可为标量或 numpy 数组（按广播规则对齐），如整条期权链的价格、执行价和到期时间；
+        初始值、实值合约的平价转换和收敛规则与 implied_volatility_from_current_data 一致，
+        每轮迭代只对尚未收敛的合约做一次向量化定价；参数无效的合约返回 nan
+        """
+        broadcast = np.broadcast_arrays(prices, S, K, T)
+        shape = broadcast[0].shape
+        prices, S, K, T = (np.array(arr, dtype=np.float64).ravel() for arr in broadcast)
+        tolerance = 1e-6
+        max_iterations = 100
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 实值看涨期权按看跌-看涨平价换成虚值看跌期权求解
+            discounted_K = K * np.exp(-r * T)
+            use_put = S > discounted_K
+            target_prices = np.where(use_put, prices - S + discounted_K, prices)
+            
+            sigma = np.maximum(np.sqrt(np.abs(2.0 / T * (np.log(S / K) + r * T))), 0.05)
+            sigma[~np.isfinite(sigma)] = np.nan
+            active = np.flatnonzero(~np.isnan(sigma))
+            
+            for i in range(max_iterations):
+                if active.size == 0:
+                    break
+                
+                bs_result = OptionCalculator.black_scholes_call_vec(
+                    S[active], K[active], T[active], r, sigma[active], G_PRICE | G_VEGA
+                )
+                model_prices = bs_result['price']
+                put = use_put[active]
+                model_prices[put] = np.maximum(
+                    discounted_K[active][put] * ndtr(-bs_result['d2'][put])
+                    - S[active][put] * ndtr(-bs_result['d1'][put]),
+                    0
+                )
+                price_diff = model_prices - target_prices[active]
+                vega = bs_result['vega'] * 100  # 转换回原始单位
+                
+                # 已收敛或vega过小的合约不再迭代，保留当前sigma；定价无效的记为nan
+                invalid = ~np.isfinite(price_diff)
+                sigma[active[invalid]] = np.nan
+                step = ~(invalid | (np.abs(price_diff) < tolerance) | (np.abs(vega) < tolerance))
+                sigma[active[step]] = np.clip(sigma[active[step]] - price_diff[step] / vega[step], 0.01, 5.0)
+                active = active[step]
+        
+        return sigma.reshape(shape)
 
 
 def calculate_option_price_scenario(symbol: str, current_btc: float, target_btc: float, 
@@ -163,22 +364,17 @@ def calculate_option_price_scenario(symbol: str, current_btc: float, target_btc:
             risk_free_rate = 0.05  # 5% 无风险利率
             current_sigma = current_iv / 100  # 转换为小数
             
-            # 情景1: 维持当前波动率
-            scenario1 = calc.black_scholes_call(
-                target_btc, strike_price, time_to_expiry, risk_free_rate, current_sigma
-            )
-            
-            # 情景2: 波动率上升（价格大幅变动时常见）
-            high_iv = current_sigma * 1.2  # 波动率上升20%
-            scenario2 = calc.black_scholes_call(
-                target_btc, strike_price, time_to_expiry, risk_free_rate, high_iv
-            )
-            
-            # 情景3: 波动率下降
-            low_iv = current_sigma * 0.8  # 波动率下降20%
-            scenario3 = calc.black_scholes_call(
-                target_btc, strike_price, time_to_expiry, risk_free_rate, low_iv
-            )
+            # 三个波动率情景：维持当前、上升20%（价格大幅变动时常见）、下降20%，一次向量化计算
+            high_iv = current_sigma * 1.2
+            low_iv = current_sigma * 0.8
+            with np.errstate(divide='raise', invalid='raise'):
+                scenarios = calc.black_scholes_call_vec(
+                    target_btc, strike_price, time_to_expiry, risk_free_rate,
+                    np.array([current_sigma, high_iv, low_iv])
+                )
+            # 每个字段整列转为Python列表，再按情景拆成三份结果
+            columns = {key: values.tolist() for key, values in scenarios.items()}
+            scenario1, scenario2, scenario3 = (dict(zip(columns, row)) for row in zip(*columns.values()))
             
             time_desc = "当日内" if same_day else "未来某时"
             print(f"\n🎯 BTC{time_desc}价格达到 ${target_btc:,.0f} 时的期权价格预估:")
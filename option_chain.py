@@ -1,15 +1,63 @@
 """
 期权链查询模块
 """
+from dataclasses import dataclass
 from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
 from typing import List, Dict, Optional
 from tabulate import tabulate
 from colorama import Fore, Style, init
-from bybit_api import BybitAPI
+from bybit_api import BybitAPI, parse_strike
 
 # 初始化colorama
 init()
 
+# 期权链行情字段：(输出字段, 接口字段, 倍数)，缺失或空值记为0
+CHAIN_TICKER_FIELDS = (
+    ('bid_price', 'bid1Price', 1),
+    ('ask_price', 'ask1Price', 1),
+    ('mark_price', 'markPrice', 1),
+    ('last_price', 'lastPrice', 1),
+    ('volume_24h', 'volume24h', 1),
+    ('open_interest', 'openInterest', 1),
+    ('iv', 'markIv', 100),  # 转换为百分比
+    ('delta', 'delta', 1),
+    ('gamma', 'gamma', 1),
+    ('theta', 'theta', 1),
+    ('vega', 'vega', 1)
+)
+
+# 选取平值期权时用到的字段
+ATM_SELECT_FIELDS = frozenset({'symbol', 'strike_price', 'option_type', 'delta'})
+
+# 期权链表格的表头与分区标题（含颜色控制符）只拼接一次
+CHAIN_HEADERS = ['执行价', '买价', '卖价', '标记价', '24h成交量', '持仓量', 'IV', 'Delta', 'Gamma', 'Theta', 'Vega']
+_CALL_TITLE = f"\n{Fore.GREEN}看涨期权 (Call){Style.RESET_ALL}"
+_PUT_TITLE = f"\n{Fore.RED}看跌期权 (Put){Style.RESET_ALL}"
+_CYAN = Fore.CYAN
+_RESET = Style.RESET_ALL
+
+
+@dataclass(slots=True)
+class OptionRow:
+    """期权链中的一个合约；按 fields 构建时未请求的字段保持默认值"""
+    symbol: str
+    strike_price: float = 0
+    option_type: str = ''
+    expiry_date: str = ''
+    bid_price: float = 0.0
+    ask_price: float = 0.0
+    mark_price: float = 0.0
+    last_price: float = 0.0
+    volume_24h: float = 0.0
+    open_interest: float = 0.0
+    iv: float = 0.0
+    delta: float = 0.0
+    gamma: float = 0.0
+    theta: float = 0.0
+    vega: float = 0.0
+
 
 class OptionChain:
     """期权链查询类"""
@@ -18,8 +66,18 @@ def __init__(self, api_client: BybitAPI):
         """初始化期权链查询"""
         self.api = api_client
     
-    def get_chain_data(self, base_coin: str = 'BTC', expiry_date: str = None) -> List[Dict]:
-        """获取期权链数据"""
+    def get_chain_data(self, base_coin: str = 'BTC', expiry_date: str = None,
+                       fields: Optional[frozenset] = None) -> List[OptionRow]:
+        """获取期权链数据，fields 指定时只填充这些字段（symbol 总是填充）"""
+        fetched = self._fetch_chain(base_coin)
+        if fetched is None:
+            return []
+        
+        instruments, tickers = fetched
+        return self._build_chain_rows(instruments, tickers, expiry_date, fields)
+    
+    def _fetch_chain(self, base_coin: str) -> Optional[tuple]:
+        """获取期权合约信息与价格数据，返回 (instruments, tickers)，失败时返回 None"""
         print(f"正在获取 {base_coin} 期权链数据...")
         
         # 获取期权合约信息
@@ -27,20 +85,31 @@ def get_chain_data(self, base_coin: str = 'BTC', expiry_date: str = None) -> Lis
         
         if instruments_data.get('retCode') != 0:
             print(f"获取期权合约失败: {instruments_data.get('retMsg')}")
-            return []
+            return None
         
         # 获取期权价格数据
         tickers_data = self.api.get_option_tickers(base_coin=base_coin)
         
         if tickers_data.get('retCode') != 0:
             print(f"获取期权价格失败: {tickers_data.get('retMsg')}")
-            return []
-        
-        # 合并数据
-        instruments = instruments_data.get('result', {}).get('list', [])
-        tickers = tickers_data.get('result', {}).get('list', [])
+            return None
         
-        # 创建ticker字典用于快速查找
+        return (instruments_data.get('result', {}).get('list', []),
+                tickers_data.get('result', {}).get('list', []))
+    
+    @staticmethod
+    def _build_chain_rows(instruments: List[Dict], tickers: List[Dict], expiry_date: str = None,
+                          fields: Optional[frozenset] = None) -> List[OptionRow]:
+        """合并合约与价格数据；只转换 fields 中的字段（None 为全部）"""
+        def wanted(name: str) -> bool:
+            return fields is None or name in fields
+        
+        want_strike = wanted('strike_price')
+        want_type = wanted('option_type')
+        want_expiry = wanted('expiry_date')
+        ticker_fields = [field for field in CHAIN_TICKER_FIELDS if wanted(field[0])]
+        
+        # 创建ticker字典用于快速查找，数值字段在用到时才转换
         ticker_dict = {ticker['symbol']: ticker for ticker in tickers}
         
         chain_data = []
@@ -51,103 +120,91 @@ def get_chain_data(self, base_coin: str = 'BTC', expiry_date: str = None) -> Lis
             if expiry_date and instrument.get('deliveryTime') != expiry_date:
                 continue
             
-            ticker = ticker_dict.get(symbol, {})
+            # 从symbol中解析执行价格，无法解析的合约与数据缓存一致直接跳过
+            strike_price = parse_strike(symbol)
+            if strike_price is None:
+                continue
             
-            # 从symbol中解析执行价格
-            strike_price = 0
-            try:
-                parts = symbol.split('-')
-                if len(parts) >= 3:
-                    strike_price = float(parts[2])
-            except (ValueError, IndexError):
-                strike_price = 0
+            row = {'symbol': symbol}
+            if want_strike:
+                row['strike_price'] = strike_price
+            if want_type:
+                row['option_type'] = instrument.get('optionsType', '')
+            if want_expiry:
+                row['expiry_date'] = instrument.get('deliveryTime', '')
             
-            chain_data.append({
-                'symbol': symbol,
-                'strike_price': strike_price,
-                'option_type': instrument.get('optionsType', ''),
-                'expiry_date': instrument.get('deliveryTime', ''),
-                'bid_price': float(ticker.get('bid1Price', 0)),
-                'ask_price': float(ticker.get('ask1Price', 0)),
-                'mark_price': float(ticker.get('markPrice', 0)),
-                'last_price': float(ticker.get('lastPrice', 0)),
-                'volume_24h': float(ticker.get('volume24h', 0)),
-                'open_interest': float(ticker.get('openInterest', 0)),
-                'iv': float(ticker.get('markIv', 0)) * 100 if ticker.get('markIv') else 0,  # 转换为百分比
-                'delta': float(ticker.get('delta', 0)),
-                'gamma': float(ticker.get('gamma', 0)),
-                'theta': float(ticker.get('theta', 0)),
-                'vega': float(ticker.get('vega', 0))
-            })
+            ticker = ticker_dict.get(symbol, {})
+            for name, key, scale in ticker_fields:
+                row[name] = float(ticker.get(key) or 0) * scale
+            
+            chain_data.append(OptionRow(**row))
         
         return chain_data
     
-    def display_chain(self, chain_data: List[Dict], strike_range: tuple = None):
+    def display_chain(self, chain_data: List[OptionRow], strike_range: tuple = None):
         """显示期权链数据"""
         if not chain_data:
             print("没有找到期权数据")
             return
         
         # 按到期日和执行价格排序
-        chain_data.sort(key=lambda x: (x['expiry_date'], x['strike_price']))
+        chain_data.sort(key=attrgetter('expiry_date', 'strike_price'))
         
         # 如果指定了执行价格范围，过滤数据
         if strike_range:
             min_strike, max_strike = strike_range
             chain_data = [
                 option for option in chain_data 
-                if min_strike <= option['strike_price'] <= max_strike
+                if min_strike <= option.strike_price <= max_strike
             ]
         
-        # 按到期日分组显示
-        current_expiry = None
-        for option in chain_data:
-            if option['expiry_date'] != current_expiry:
-                current_expiry = option['expiry_date']
-                expiry_dt = datetime.fromtimestamp(int(current_expiry) / 1000)
-                print(f"\n{Fore.CYAN}=== 到期日: {expiry_dt.strftime('%Y-%m-%d %H:%M:%S')} ==={Style.RESET_ALL}")
-                
-                # 创建表格数据
-                calls = []
-                puts = []
-                
-                # 分离看涨和看跌期权
-                for opt in chain_data:
-                    if opt['expiry_date'] == current_expiry:
-                        row = [
-                            opt['strike_price'],
-                            f"{opt['bid_price']:.4f}",
-                            f"{opt['ask_price']:.4f}",
-                            f"{opt['mark_price']:.4f}",
-                            f"{opt['volume_24h']:.0f}",
-                            f"{opt['open_interest']:.0f}",
-                            f"{opt['iv']:.1f}%",
-                            f"{opt['delta']:.3f}",
-                            f"{opt['gamma']:.4f}",
-                            f"{opt['theta']:.4f}",
-                            f"{opt['vega']:.4f}"
-                        ]
-                        
-                        if opt['option_type'] == 'Call':
-                            calls.append(row)
-                        else:
-                            puts.append(row)
-                
-                # 显示看涨期权
-                if calls:
-                    print(f"\n{Fore.GREEN}看涨期权 (Call){Style.RESET_ALL}")
-                    headers = ['执行价', '买价', '卖价', '标记价', '24h成交量', '持仓量', 'IV', 'Delta', 'Gamma', 'Theta', 'Vega']
-                    print(tabulate(calls, headers=headers, tablefmt='grid', floatfmt='.4f'))
-                
-                # 显示看跌期权
-                if puts:
-                    print(f"\n{Fore.RED}看跌期权 (Put){Style.RESET_ALL}")
-                    headers = ['执行价', '买价', '卖价', '标记价', '24h成交量', '持仓量', 'IV', 'Delta', 'Gamma', 'Theta', 'Vega']
-                    print(tabulate(puts, headers=headers, tablefmt='grid', floatfmt='.4f'))
+        # 数据已按到期日排序，一次遍历按到期日分组显示
+        for current_expiry, group in groupby(chain_data, key=attrgetter('expiry_date')):
+            expiry_dt = datetime.fromtimestamp(int(current_expiry) / 1000)
+            print(f"\n{_CYAN}=== 到期日: {expiry_dt.strftime('%Y-%m-%d %H:%M:%S')} ==={_RESET}")
+            
+            # 分离看涨和看跌期权
+            calls = []
+            puts = []
+            for opt in group:
+                (calls if opt.option_type == 'Call' else puts).append(self._format_row(opt))
+            
+            # 显示看涨期权
+            if calls:
+                print(_CALL_TITLE)
+                print(tabulate(calls, headers=CHAIN_HEADERS, tablefmt='grid', floatfmt='.4f'))
+            
+            # 显示看跌期权
+            if puts:
+                print(_PUT_TITLE)
+                print(tabulate(puts, headers=CHAIN_HEADERS, tablefmt='grid', floatfmt='.4f'))
+    
+    @staticmethod
+    def _format_row(opt: OptionRow) -> List:
+        """期权链表格的一行"""
+        return [
+            opt.strike_price,
+            f"{opt.bid_price:.4f}",
+            f"{opt.ask_price:.4f}",
+            f"{opt.mark_price:.4f}",
+            f"{opt.volume_24h:.0f}",
+            f"{opt.open_interest:.0f}",
+            f"{opt.iv:.1f}%",
+            f"{opt.delta:.3f}",
+            f"{opt.gamma:.4f}",
+            f"{opt.theta:.4f}",
+            f"{opt.vega:.4f}"
+        ]
     
-    def get_atm_options(self, base_coin: str = 'BTC', spot_price: float = None) -> List[Dict]:
+    def get_atm_options(self, base_coin: str = 'BTC', spot_price: float = None) -> List[OptionRow]:
         """获取平值期权"""
-        chain_data = self.get_chain_data(base_coin)
+        fetched = self._fetch_chain(base_coin)
+        if fetched is None:
+            return []
+        
+        # 先只转换选取平值期权所需的字段
+        instruments, tickers = fetched
+        chain_data = self._build_chain_rows(instruments, tickers, fields=ATM_SELECT_FIELDS)
         
         if not chain_data:
             return []
@@ -155,25 +212,24 @@ def get_atm_options(self, base_coin: str = 'BTC', spot_price: float = None) -> L
         # 如果没有提供现货价格，尝试从期权数据推断
         if spot_price is None:
             # 使用delta最接近0.5的看涨期权的执行价作为参考
-            call_options = [opt for opt in chain_data if opt['option_type'] == 'Call']
+            call_options = [opt for opt in chain_data if opt.option_type == 'Call']
             if call_options:
-                atm_call = min(call_options, key=lambda x: abs(x['delta'] - 0.5))
-                spot_price = atm_call['strike_price']
+                atm_call = min(call_options, key=lambda x: abs(x.delta - 0.5))
+                spot_price = atm_call.strike_price
             else:
                 print("无法确定现货价格")
                 return []
         
-        # 找到最接近现货价格的执行价
-        strikes = list(set(opt['strike_price'] for opt in chain_data))
-        closest_strike = min(strikes, key=lambda x: abs(x - spot_price))
+        # 找到最接近现货价格的执行价（直接一次遍历，无需先去重）
+        closest_strike = min((opt.strike_price for opt in chain_data), key=lambda x: abs(x - spot_price))
         
-        # 返回该执行价的所有期权
-        atm_options = [
-            opt for opt in chain_data 
-            if opt['strike_price'] == closest_strike
+        # 返回该执行价的所有期权，只为这些合约构建完整数据
+        atm_instruments = [
+            instrument for instrument in instruments
+            if parse_strike(instrument.get('symbol', '')) == closest_strike
         ]
         
-        return atm_options
+        return self._build_chain_rows(atm_instruments, tickers)
     
     def get_expiry_dates(self, base_coin: str = 'BTC') -> List[str]:
         """获取所有可用的到期日"""
@@ -183,10 +239,10 @@ def get_expiry_dates(self, base_coin: str = 'BTC') -> List[str]:
             return []
         
         instruments = instruments_data.get('result', {}).get('list', [])
-        expiry_dates = list(set(
-            datetime.fromtimestamp(int(inst['deliveryTime']) / 1000).strftime('%Y-%m-%d')
-            for inst in instruments
-            if inst.get('deliveryTime')
-        ))
+        # 同一到期时间的合约很多，先对时间戳去重再格式化
+        delivery_times = {inst['deliveryTime'] for inst in instruments if inst.get('deliveryTime')}
         
-        return sorted(expiry_dates)
+        return sorted({
+            datetime.fromtimestamp(int(delivery_time) / 1000).strftime('%Y-%m-%d')
+            for delivery_time in delivery_times
+        })
@@ -0,0 +1,45 @@
+"""
+期权筛选计算内核
+安装了 numba 时使用JIT编译的并行循环，否则使用NumPy向量化实现
+"""
+from typing import Tuple
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _filter_numpy(expiry_ms: np.ndarray, strike: np.ndarray, is_call: np.ndarray, want_call: bool,
+                  start_ms: int, end_ms: int, target: float) -> Tuple[np.ndarray, np.ndarray]:
+    """NumPy实现：布尔掩码筛选后计算执行价差距"""
+    mask = (is_call == want_call) & (expiry_ms >= start_ms) & (expiry_ms <= end_ms)
+    indices = np.nonzero(mask)[0]
+    return indices, np.abs(strike[indices] - target)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True)
+    def _filter_numba(expiry_ms, strike, is_call, want_call, start_ms, end_ms, target):
+        """Numba实现：单次并行遍历生成掩码，再为命中的行计算差距"""
+        n = expiry_ms.shape[0]
+        mask = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            mask[i] = is_call[i] == want_call and expiry_ms[i] >= start_ms and expiry_ms[i] <= end_ms
+
+        indices = np.nonzero(mask)[0]
+        diffs = np.empty(indices.shape[0], dtype=np.float64)
+        for j in prange(indices.shape[0]):
+            diffs[j] = abs(strike[indices[j]] - target)
+        return indices, diffs
+
+
+def filter_options(expiry_ms: np.ndarray, strike: np.ndarray, is_call: np.ndarray, want_call: bool,
+                   start_ms: int, end_ms: int, target: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按期权方向和到期时间窗口筛选，返回 (命中的下标, 与目标价的差距)"""
+    if NUMBA_AVAILABLE:
+        return _filter_numba(expiry_ms, strike, is_call, bool(want_call),
+                             np.int64(start_ms), np.int64(end_ms), float(target))
+    return _filter_numpy(expiry_ms, strike, is_call, want_call, start_ms, end_ms, target)
@@ -1,7 +1,8 @@
 """
 持仓查询模块
 """
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 from tabulate import tabulate
 from colorama import Fore, Style, init
 from bybit_api import BybitAPI
@@ -9,6 +10,27 @@
 # 初始化colorama
 init()
 
+# 颜色控制符绑定为模块常量，表格循环中不再逐行查找属性
+_GREEN = Fore.GREEN
+_RED = Fore.RED
+_RESET = Style.RESET_ALL
+
+
+@dataclass(slots=True)
+class PositionRow:
+    """一个有持仓的期权合约"""
+    symbol: str
+    side: str
+    size: float
+    avg_price: float
+    mark_price: float
+    unrealized_pnl: float
+    percentage: float
+    leverage: str
+    risk_limit: float
+    created_time: str
+    updated_time: str
+
 
 class PositionManager:
     """持仓管理类"""
@@ -17,40 +39,57 @@ def __init__(self, api_client: BybitAPI):
         """初始化持仓管理"""
         self.api = api_client
     
-    def get_option_positions(self, symbol: str = None) -> List[Dict]:
+    def get_option_positions(self, symbol: str = None) -> List[PositionRow]:
         """获取期权持仓"""
+        return self._fetch_option_positions(symbol)[0]
+    
+    def _fetch_option_positions(self, symbol: str = None) -> Tuple[List[PositionRow], Dict]:
+        """获取期权持仓，同时在过滤的同一次遍历中累计盈亏合计与多空数量"""
         print("正在获取期权持仓数据...")
         
+        stats = {'total_pnl': 0, 'long_positions': 0, 'short_positions': 0}
         positions_data = self.api.get_positions('option', symbol)
         
         if positions_data.get('retCode') != 0:
             print(f"获取持仓失败: {positions_data.get('retMsg')}")
-            return []
+            return [], stats
         
         positions = positions_data.get('result', {}).get('list', [])
         
         # 过滤出有持仓的合约
         active_positions = []
+        total_pnl = 0
+        long_positions = 0
+        short_positions = 0
         for pos in positions:
             size = float(pos.get('size', 0))
             if size != 0:  # 只显示有持仓的合约
-                active_positions.append({
-                    'symbol': pos.get('symbol', ''),
-                    'side': pos.get('side', ''),
-                    'size': size,
-                    'avg_price': float(pos.get('avgPrice', 0)),
-                    'mark_price': float(pos.get('markPrice', 0)),
-                    'unrealized_pnl': float(pos.get('unrealisedPnl', 0)),
-                    'percentage': float(pos.get('unrealisedPnlPercentage', 0)) * 100,
-                    'leverage': pos.get('leverage', '1'),
-                    'risk_limit': float(pos.get('riskLimitValue') or 0),
-                    'created_time': pos.get('createdTime', ''),
-                    'updated_time': pos.get('updatedTime', '')
-                })
-        
-        return active_positions
+                side = pos.get('side', '')
+                unrealized_pnl = float(pos.get('unrealisedPnl', 0))
+                total_pnl += unrealized_pnl
+                if side == 'Buy':
+                    long_positions += 1
+                elif side == 'Sell':
+                    short_positions += 1
+                
+                active_positions.append(PositionRow(
+                    symbol=pos.get('symbol', ''),
+                    side=side,
+                    size=size,
+                    avg_price=float(pos.get('avgPrice', 0)),
+                    mark_price=float(pos.get('markPrice', 0)),
+                    unrealized_pnl=unrealized_pnl,
+                    percentage=float(pos.get('unrealisedPnlPercentage', 0)) * 100,
+                    leverage=pos.get('leverage', '1'),
+                    risk_limit=float(pos.get('riskLimitValue') or 0),
+                    created_time=pos.get('createdTime', ''),
+                    updated_time=pos.get('updatedTime', '')
+                ))
+        
+        stats.update(total_pnl=total_pnl, long_positions=long_positions, short_positions=short_positions)
+        return active_positions, stats
     
-    def display_positions(self, positions: List[Dict]):
+    def display_positions(self, positions: List[PositionRow]):
         """显示持仓信息"""
         if not positions:
             print(f"{Fore.YELLOW}当前没有期权持仓{Style.RESET_ALL}")
@@ -62,26 +101,26 @@ def display_positions(self, positions: List[Dict]):
         
         for pos in positions:
             # 根据盈亏设置颜色
-            pnl = pos['unrealized_pnl']
+            pnl = pos.unrealized_pnl
             total_pnl += pnl
             
             if pnl > 0:
-                pnl_color = Fore.GREEN
+                pnl_color = _GREEN
             elif pnl < 0:
-                pnl_color = Fore.RED
+                pnl_color = _RED
             else:
-                pnl_color = Style.RESET_ALL
+                pnl_color = _RESET
             
             # 格式化数据
             row = [
-                pos['symbol'],
-                pos['side'],
-                f"{pos['size']:.4f}",
-                f"{pos['avg_price']:.4f}",
-                f"{pos['mark_price']:.4f}",
-                f"{pnl_color}{pnl:.4f}{Style.RESET_ALL}",
-                f"{pnl_color}{pos['percentage']:.2f}%{Style.RESET_ALL}",
-                pos['leverage']
+                pos.symbol,
+                pos.side,
+                f"{pos.size:.4f}",
+                f"{pos.avg_price:.4f}",
+                f"{pos.mark_price:.4f}",
+                f"{pnl_color}{pnl:.4f}{_RESET}",
+                f"{pnl_color}{pos.percentage:.2f}%{_RESET}",
+                pos.leverage
             ]
             table_data.append(row)
         
@@ -166,14 +205,14 @@ def display_wallet(self, wallet_info: Dict):
             
             for coin_info in wallet_info['coins']:
                 upl = coin_info['unrealized_pnl']
-                upl_color = Fore.GREEN if upl >= 0 else Fore.RED
+                upl_color = _GREEN if upl >= 0 else _RED
                 
                 row = [
                     coin_info['coin'],
                     f"{coin_info['wallet_balance']:.8f}",
                     f"{coin_info['available_balance']:.8f}",
                     f"{coin_info['usd_value']:.4f}",
-                    f"{upl_color}{upl:.4f}{Style.RESET_ALL}"
+                    f"{upl_color}{upl:.4f}{_RESET}"
                 ]
                 coin_table.append(row)
             
@@ -182,19 +221,14 @@ def display_wallet(self, wallet_info: Dict):
     
     def get_position_summary(self) -> Dict:
         """获取持仓摘要"""
-        positions = self.get_option_positions()
+        # 合计与多空数量在获取持仓时已累计，无需再遍历
+        positions, stats = self._fetch_option_positions()
         
         if not positions:
             return {'total_positions': 0, 'total_pnl': 0, 'long_positions': 0, 'short_positions': 0}
         
-        total_pnl = sum(pos['unrealized_pnl'] for pos in positions)
-        long_positions = len([pos for pos in positions if pos['side'] == 'Buy'])
-        short_positions = len([pos for pos in positions if pos['side'] == 'Sell'])
-        
         return {
             'total_positions': len(positions),
-            'total_pnl': total_pnl,
-            'long_positions': long_positions,
-            'short_positions': short_positions,
+            **stats,
             'positions': positions
         }
@@ -1,60 +1,126 @@
 """价格监控API接口"""
-import json
+import re
 import uuid
 import logging
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from typing import Dict, Any, Literal, Optional, Tuple
+import orjson
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError, ValidationInfo, field_validator
 from .models import OptionInfo, MonitorTask
 from .monitor_service import get_monitor_service, stop_monitor_service
-from .config import MonitorConfig
-
-# 配置日志
-logging.basicConfig(
-    level=getattr(logging, MonitorConfig.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(MonitorConfig.LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+from .config import MonitorConfig, setup_logging
+
+# 配置日志（直接 uvicorn price_monitor.api:app 启动时生效；经main启动时已配置则跳过）
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 
-def _load_active_task_snapshot() -> Dict[str, Any]:
-    """读取活跃任务快照文件。"""
+# 期权合约符号: BASE-EXPIRY-STRIKE-TYPE[-USDT]
+_OPTION_RE = re.compile(r"^(BTC|ETH)-([0-9A-Z]+)-(\d+(?:\.\d+)?)-(C|P|Call|Put)(?:-USDT)?$")
+_OPTION_TYPE_MAP = {'C': 'Call', 'Call': 'Call', 'P': 'Put', 'Put': 'Put'}
+
+
+def _option_symbol_error(symbol: str) -> str:
+    """期权合约符号校验失败时给出具体原因（仅在失败路径调用）"""
+    parts = symbol.split('-')
+    if len(parts) not in (4, 5):
+        return "期权合约符号格式错误，应为: BASE-EXPIRY-STRIKE-TYPE 或 BASE-EXPIRY-STRIKE-TYPE-USDT"
+    if parts[0] not in ('BTC', 'ETH'):
+        return "基础币种只支持 BTC 或 ETH"
+    if parts[3] not in _OPTION_TYPE_MAP:
+        return "期权类型只支持 C/Call（看涨）或 P/Put（看跌）"
+    if not re.fullmatch(r"\d+(?:\.\d+)?", parts[2]):
+        return "执行价格必须是有效数字"
+    if len(parts) == 5 and parts[4] != 'USDT':
+        return "目前只支持USDT结算的期权"
+    return "到期日格式错误，应为如 17JAN25 的大写字母数字"
+
+
+@lru_cache(maxsize=2048)
+def _parse_option_symbol(symbol: str) -> OptionInfo:
+    """解析期权合约符号（同一策略内符号高度重复，结果缓存复用）"""
+    match = _OPTION_RE.match(symbol)
+    if match is None:
+        raise ValueError(_option_symbol_error(symbol))
+    base_coin, expiry, strike, option_type = match.groups()
+    
+    return OptionInfo(
+        symbol=symbol,
+        base_coin=base_coin,
+        strike_price=float(strike),
+        expiry_date=expiry,
+        option_type=_OPTION_TYPE_MAP[option_type]
+    )
+
+
+# 快照解析结果缓存: ((路径, st_mtime_ns, st_size), {"raw": 快照数据, "by_id": task_id索引})
+_SNAPSHOT_CACHE: Optional[Tuple[Tuple[str, int, int], Dict[str, Any]]] = None
+
+
+def _empty_snapshot() -> Dict[str, Any]:
+    return {"raw": {"updated_at": None, "tasks": []}, "by_id": {}}
+
+
+def _load_snapshot_cache() -> Dict[str, Any]:
+    """读取活跃任务快照及其task_id索引，文件未变化时直接返回缓存结果。"""
+    global _SNAPSHOT_CACHE
     file_path = MonitorConfig.ACTIVE_TASKS_FILE
-    if not file_path.exists():
-        return {"updated_at": None, "tasks": []}
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
+        return _empty_snapshot()
+    except OSError as exc:
+        logger.exception("读取活跃任务快照失败: %s", exc)
+        return _empty_snapshot()
+
+    key = (str(file_path), st.st_mtime_ns, st.st_size)
+    cached = _SNAPSHOT_CACHE
+    if cached is not None and cached[0] == key:
+        return cached[1]
 
     try:
-        data = json.loads(file_path.read_text(encoding="utf-8"))
-        if isinstance(data, dict):
-            data.setdefault("tasks", [])
-            return data
-        return {"updated_at": None, "tasks": []}
+        # 直接从字节解析，省去UTF-8解码出的中间字符串
+        data = orjson.loads(file_path.read_bytes())
+        if not isinstance(data, dict):
+            return _empty_snapshot()
+        tasks = data.setdefault("tasks", [])
+        entry = {
+            "raw": data,
+            "by_id": {t.get("task_id"): t for t in tasks if isinstance(t, dict)},
+        }
+        _SNAPSHOT_CACHE = (key, entry)
+        return entry
     except Exception as exc:  # pylint: disable=broad-except
         logger.exception("读取活跃任务快照失败: %s", exc)
-        return {"updated_at": None, "tasks": []}
+        return _empty_snapshot()
+
+
+def _load_active_task_snapshot() -> Dict[str, Any]:
+    """读取活跃任务快照文件。"""
+    return _load_snapshot_cache()["raw"]
 
 
 def _find_snapshot_task(task_id: str) -> Optional[Dict[str, Any]]:
     """在快照中查找指定任务。"""
-    snapshot = _load_active_task_snapshot()
-    for item in snapshot.get("tasks", []):
-        if item.get("task_id") == task_id:
-            item["snapshot_updated_at"] = snapshot.get("updated_at")
-            return item
-    return None
+    cache = _load_snapshot_cache()
+    entry = cache["by_id"].get(task_id)
+    if entry is None:
+        return None
+    # 快照数据被缓存共享，复制后再附加字段
+    return {**entry, "snapshot_updated_at": cache["raw"].get("updated_at")}
 
 # 创建FastAPI应用
 app = FastAPI(
     title="期权价格监控API",
     description="实时监控期权价格并在达到目标价格时发送webhook通知",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # 添加CORS中间件
@@ -76,73 +142,41 @@ class CreateMonitorTaskRequest(BaseModel):
     timeout_hours: int = Field(24, ge=1, le=168, description="任务超时时间（小时），默认24小时，最大168小时")
     strategy_id: str = Field(..., description="策略ID")
     level_id: str = Field(..., description="Level ID")
-    monitor_type: str = Field(..., description="监控类型: ENTRY/TAKE_PROFIT/STOP_LOSS")
+    monitor_type: Literal['ENTRY', 'TAKE_PROFIT', 'STOP_LOSS'] = Field(..., description="监控类型: ENTRY/TAKE_PROFIT/STOP_LOSS")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="附加数据")
-    monitor_instrument: str = Field('option', description="监控标的类型: option 或 spot")
-    monitor_symbol: Optional[str] = Field(None, description="实际监控的symbol，option模式默认为期权符号")
+    monitor_instrument: Literal['option', 'spot'] = Field('option', description="监控标的类型: option 或 spot")
+    monitor_symbol: Optional[str] = Field(None, validate_default=True, description="实际监控的symbol，option模式默认为期权符号")
     
-    @validator('option_symbol')
-    def validate_option_symbol(cls, v):
+    @field_validator('option_symbol', mode='after')
+    @classmethod
+    def validate_option_symbol(cls, v: str) -> str:
         """验证期权合约符号格式"""
         # 支持两种格式：
         # 1. BTC-17JAN25-100000-C (旧格式)
         # 2. BTC-17JAN25-100000-C-USDT (新格式，Bybit实际使用的)
-        parts = v.split('-')
-        if len(parts) not in [4, 5]:
-            raise ValueError("期权合约符号格式错误，应为: BASE-EXPIRY-STRIKE-TYPE 或 BASE-EXPIRY-STRIKE-TYPE-USDT")
-        
-        base_coin = parts[0]
-        expiry = parts[1]
-        strike = parts[2]
-        option_type = parts[3]
-        
-        if base_coin not in ['BTC', 'ETH']:
-            raise ValueError("基础币种只支持 BTC 或 ETH")
-        
-        if option_type not in ['C', 'P', 'Call', 'Put']:
-            raise ValueError("期权类型只支持 C/Call（看涨）或 P/Put（看跌）")
-        
-        try:
-            float(strike)
-        except ValueError:
-            raise ValueError("执行价格必须是有效数字")
-        
-        # 如果是5部分格式，检查最后一部分是否为USDT
-        if len(parts) == 5 and parts[4] not in ['USDT']:
-            raise ValueError("目前只支持USDT结算的期权")
-        
+        # 校验即解析：结果进入_parse_option_symbol缓存，创建任务时直接命中，不再二次匹配
+        _parse_option_symbol(v)
         return v
     
-    @validator('webhook_url')
-    def validate_webhook_url(cls, v):
+    @field_validator('webhook_url', mode='after')
+    @classmethod
+    def validate_webhook_url(cls, v: str) -> str:
         """验证webhook URL"""
         if not v.startswith(('http://', 'https://')):
             raise ValueError("webhook URL必须以 http:// 或 https:// 开头")
         return v
 
-    @validator('monitor_type')
-    def validate_monitor_type(cls, v):
-        allowed = {'ENTRY', 'TAKE_PROFIT', 'STOP_LOSS'}
-        if v not in allowed:
-            raise ValueError(f"monitor_type 必须是 {allowed}")
-        return v
-
-    @validator('monitor_instrument')
-    def validate_monitor_instrument(cls, v):
-        allowed = {'option', 'spot'}
-        if v not in allowed:
-            raise ValueError(f"monitor_instrument 必须是 {allowed}")
-        return v
-
-    @validator('monitor_symbol', always=True)
-    def ensure_monitor_symbol(cls, v, values):
-        instrument = values.get('monitor_instrument', 'option')
-        option_symbol = values.get('option_symbol')
+    @field_validator('monitor_symbol', mode='after')
+    @classmethod
+    def ensure_monitor_symbol(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
+        instrument = info.data.get('monitor_instrument', 'option')
+        option_symbol = info.data.get('option_symbol')
         if instrument == 'spot':
             if not v:
                 raise ValueError("monitor_symbol 在 spot 模式下必填")
             return v.upper()
-        return (v or option_symbol).upper()
+        v = v or option_symbol
+        return v.upper() if v else v
 
 class TaskStatusResponse(BaseModel):
     """任务状态响应"""
@@ -165,6 +199,7 @@ class ApiResponse(BaseModel):
     data: Dict[str, Any] = None
 
 # API路由
+# 各路由直接返回ORJSONResponse，FastAPI不再按response_model校验和转换，response_model仅用于生成文档
 @app.on_event("startup")
 async def startup_event():
     """应用启动事件"""
@@ -188,10 +223,10 @@ async def shutdown_event():
 @app.get("/", response_model=ApiResponse)
 async def root():
     """根路径"""
-    return ApiResponse(
-        success=True,
-        message="期权价格监控API运行中",
-        data={
+    return ORJSONResponse({
+        "success": True,
+        "message": "期权价格监控API运行中",
+        "data": {
             "version": "1.0.0",
             "endpoints": {
                 "create_task": "POST /api/monitor/create",
@@ -200,7 +235,7 @@ async def root():
                 "list_tasks": "GET /api/monitor/tasks"
             }
         }
-    )
+    })
 
 @app.get("/health")
 async def health_check():
@@ -222,9 +257,26 @@ async def health_check():
             "error": str(e)
         }
 
-@app.post("/api/monitor/create", response_model=ApiResponse)
-async def create_monitor_task(request: CreateMonitorTaskRequest):
+@app.post(
+    "/api/monitor/create",
+    response_model=ApiResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CreateMonitorTaskRequest.model_json_schema()}},
+        }
+    },
+)
+async def create_monitor_task(http_request: Request):
     """创建监控任务"""
+    # 原始请求体一次性交给pydantic-core完成JSON解析和校验，不经过json.loads中间字典
+    try:
+        request = CreateMonitorTaskRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
     try:
         # 获取监控服务
         monitor_service = await get_monitor_service()
@@ -283,18 +335,18 @@ async def create_monitor_task(request: CreateMonitorTaskRequest):
         
         logger.info(f"创建监控任务成功: {request.task_id}")
         
-        return ApiResponse(
-            success=True,
-            message="监控任务创建成功",
-            data={
+        return ORJSONResponse({
+            "success": True,
+            "message": "监控任务创建成功",
+            "data": {
                 "task_id": request.task_id,
                 "option_symbol": request.option_symbol,
                 "monitor_symbol": request.monitor_symbol,
                 "monitor_instrument": request.monitor_instrument,
                 "target_price": request.target_price,
-                "expires_at": expires_at.isoformat()
+                "expires_at": task.expires_at_iso
             }
-        )
+        })
         
     except HTTPException:
         raise
@@ -302,25 +354,49 @@ async def create_monitor_task(request: CreateMonitorTaskRequest):
         logger.error(f"创建监控任务失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/monitor/tasks", response_model=ApiResponse)
+async def list_monitor_tasks():
+    """获取所有活跃监控任务"""
+    try:
+        snapshot = _load_active_task_snapshot()
+        task_list = snapshot.get("tasks", [])
+        message = f"当前有 {len(task_list)} 个活跃监控任务"
+        if snapshot.get("updated_at"):
+            message += f"，最近更新时间 {snapshot['updated_at']}"
+
+        return ORJSONResponse({
+            "success": True,
+            "message": message,
+            "data": {
+                "tasks": task_list,
+                "updated_at": snapshot.get("updated_at"),
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"获取监控任务列表失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/monitor/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str):
     """获取任务状态"""
     try:
         snapshot_task = _find_snapshot_task(task_id)
         if snapshot_task:
-            return TaskStatusResponse(
-                task_id=snapshot_task["task_id"],
-                status=snapshot_task.get("status"),
-                option_symbol=snapshot_task.get("option_symbol"),
-                monitor_symbol=snapshot_task.get("monitor_symbol", snapshot_task.get("option_symbol")),
-                monitor_instrument=snapshot_task.get("monitor_instrument", "option"),
-                target_price=snapshot_task.get("target_price"),
-                current_price=snapshot_task.get("current_price"),
-                created_at=snapshot_task.get("created_at"),
-                expires_at=snapshot_task.get("expires_at"),
-                triggered_at=snapshot_task.get("triggered_at"),
-                webhook_url=snapshot_task.get("webhook_url"),
-            )
+            # 快照已是JSON结构，按TaskStatusResponse字段取值后直接序列化
+            return ORJSONResponse({
+                "task_id": snapshot_task["task_id"],
+                "status": snapshot_task.get("status"),
+                "option_symbol": snapshot_task.get("option_symbol"),
+                "monitor_symbol": snapshot_task.get("monitor_symbol", snapshot_task.get("option_symbol")),
+                "monitor_instrument": snapshot_task.get("monitor_instrument", "option"),
+                "target_price": snapshot_task.get("target_price"),
+                "current_price": snapshot_task.get("current_price"),
+                "created_at": snapshot_task.get("created_at"),
+                "expires_at": snapshot_task.get("expires_at"),
+                "triggered_at": snapshot_task.get("triggered_at"),
+                "webhook_url": snapshot_task.get("webhook_url"),
+            })
 
         monitor_service = await get_monitor_service()
         task = await monitor_service.get_task_status(task_id)
@@ -331,19 +407,19 @@ async def get_task_status(task_id: str):
                 detail=f"任务 '{task_id}' 不存在"
             )
         
-        return TaskStatusResponse(
-            task_id=task.task_id,
-            status=task.status,
-            option_symbol=task.option_info.symbol,
-            monitor_symbol=task.monitor_symbol,
-            monitor_instrument=task.monitor_instrument,
-            target_price=task.target_price,
-            current_price=task.current_price,
-            created_at=task.created_at.isoformat(),
-            expires_at=task.expires_at.isoformat(),
-            triggered_at=task.triggered_at.isoformat() if task.triggered_at else None,
-            webhook_url=task.webhook_url
-        )
+        return ORJSONResponse({
+            "task_id": task.task_id,
+            "status": task.status,
+            "option_symbol": task.option_info.symbol,
+            "monitor_symbol": task.monitor_symbol,
+            "monitor_instrument": task.monitor_instrument,
+            "target_price": task.target_price,
+            "current_price": task.current_price,
+            "created_at": task.created_at_iso,
+            "expires_at": task.expires_at_iso,
+            "triggered_at": task.triggered_at_iso,
+            "webhook_url": task.webhook_url
+        })
         
     except HTTPException:
         raise
@@ -376,11 +452,11 @@ async def delete_monitor_task(task_id: str):
         
         logger.info(f"删除监控任务成功: {task_id}")
         
-        return ApiResponse(
-            success=True,
-            message="监控任务删除成功",
-            data={"task_id": task_id}
-        )
+        return ORJSONResponse({
+            "success": True,
+            "message": "监控任务删除成功",
+            "data": {"task_id": task_id}
+        })
         
     except HTTPException:
         raise
@@ -388,72 +464,25 @@ async def delete_monitor_task(task_id: str):
         logger.error(f"删除监控任务失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/monitor/tasks", response_model=ApiResponse)
-async def list_monitor_tasks():
-    """获取所有活跃监控任务"""
-    try:
-        snapshot = _load_active_task_snapshot()
-        task_list = snapshot.get("tasks", [])
-        message = f"当前有 {len(task_list)} 个活跃监控任务"
-        if snapshot.get("updated_at"):
-            message += f"，最近更新时间 {snapshot['updated_at']}"
-
-        return ApiResponse(
-            success=True,
-            message=message,
-            data={
-                "tasks": task_list,
-                "updated_at": snapshot.get("updated_at"),
-            }
-        )
-
-    except Exception as e:
-        logger.error(f"获取监控任务列表失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-def _parse_option_symbol(symbol: str) -> OptionInfo:
-    """解析期权合约符号"""
-    parts = symbol.split('-')
-    base_coin = parts[0]
-    expiry = parts[1]
-    strike = parts[2]
-    option_type = parts[3]
-    
-    # 处理期权类型
-    if option_type in ['C', 'Call']:
-        opt_type = "Call"
-    elif option_type in ['P', 'Put']:
-        opt_type = "Put"
-    else:
-        opt_type = option_type
-    
-    return OptionInfo(
-        symbol=symbol,
-        base_coin=base_coin,
-        strike_price=float(strike),
-        expiry_date=expiry,
-        option_type=opt_type
-    )
-
 # 错误处理
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """HTTP异常处理"""
-    return {
+    return ORJSONResponse({
         "success": False,
         "message": exc.detail,
         "status_code": exc.status_code
-    }
+    }, status_code=exc.status_code)
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """通用异常处理"""
     logger.error(f"未处理的异常: {exc}")
-    return {
+    return ORJSONResponse({
         "success": False,
         "message": "服务器内部错误",
         "status_code": 500
-    }
+    }, status_code=500)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,8 @@
 """
 价格监控配置文件
 """
+import logging
+import logging.handlers
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -39,6 +41,30 @@ class MonitorConfig:
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'price_monitor.log')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))  # 单个日志文件上限
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
 
     # 活跃任务快照文件
     ACTIVE_TASKS_FILE = Path(__file__).resolve().parent / "active_tasks.json"
+
+
+def setup_logging() -> None:
+    """配置根日志器（已存在handler时跳过，避免重复写入日志文件）"""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    logging.basicConfig(
+        level=getattr(logging, MonitorConfig.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            # delay=True: 首次写日志时才打开文件；按大小轮转，避免日志无限增长
+            logging.handlers.RotatingFileHandler(
+                MonitorConfig.LOG_FILE,
+                maxBytes=MonitorConfig.LOG_MAX_BYTES,
+                backupCount=MonitorConfig.LOG_BACKUP_COUNT,
+                encoding='utf-8',
+                delay=True,
+            ),
+            logging.StreamHandler()
+        ]
+    )
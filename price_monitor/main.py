@@ -7,18 +7,7 @@
 import signal
 import sys
 from .api import app
-from .config import MonitorConfig
-
-def setup_logging():
-    """设置日志"""
-    logging.basicConfig(
-        level=getattr(logging, MonitorConfig.LOG_LEVEL),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(MonitorConfig.LOG_FILE),
-            logging.StreamHandler()
-        ]
-    )
+from .config import MonitorConfig, setup_logging
 
 def signal_handler(signum, frame):
     """信号处理器"""
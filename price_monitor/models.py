@@ -1,14 +1,14 @@
 """
 数据模型
 """
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OptionInfo:
-    """期权信息"""
+    """期权信息（不可变，可在解析缓存中安全共享）"""
     symbol: str          # 期权合约符号，如 BTC-17JAN25-100000-C
     base_coin: str       # 基础币种，如 BTC
     strike_price: float  # 执行价格
@@ -16,9 +16,15 @@ class OptionInfo:
     option_type: str     # 期权类型 Call/Put
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'symbol': self.symbol,
+            'base_coin': self.base_coin,
+            'strike_price': self.strike_price,
+            'expiry_date': self.expiry_date,
+            'option_type': self.option_type,
+        }
 
-@dataclass
+@dataclass(slots=True)
 class MonitorTask:
     """监控任务"""
     task_id: str                    # 任务唯一编号
@@ -37,38 +43,83 @@ class MonitorTask:
     monitor_type: Optional[str] = None       # ENTRY/TAKE_PROFIT/STOP_LOSS
     metadata: Optional[Dict[str, Any]] = None
     monitor_instrument: str = "option"  # 监控标的类型: option/spot
+    # isoformat结果缓存: (源datetime, 字符串)，源对象被替换时重新格式化
+    _created_iso: Optional[Tuple[datetime, str]] = field(default=None, init=False, repr=False, compare=False)
+    _expires_iso: Optional[Tuple[datetime, str]] = field(default=None, init=False, repr=False, compare=False)
+    _triggered_iso: Optional[Tuple[datetime, str]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def created_at_iso(self) -> str:
+        cached = self._created_iso
+        if cached is None or cached[0] is not self.created_at:
+            cached = self._created_iso = (self.created_at, self.created_at.isoformat())
+        return cached[1]
+
+    @property
+    def expires_at_iso(self) -> str:
+        cached = self._expires_iso
+        if cached is None or cached[0] is not self.expires_at:
+            cached = self._expires_iso = (self.expires_at, self.expires_at.isoformat())
+        return cached[1]
+
+    @property
+    def triggered_at_iso(self) -> Optional[str]:
+        if not self.triggered_at:
+            return None
+        cached = self._triggered_iso
+        if cached is None or cached[0] is not self.triggered_at:
+            cached = self._triggered_iso = (self.triggered_at, self.triggered_at.isoformat())
+        return cached[1]
 
     def to_dict(self) -> Dict[str, Any]:
-        result = asdict(self)
-        # 处理datetime序列化
-        result['created_at'] = self.created_at.isoformat()
-        result['expires_at'] = self.expires_at.isoformat()
-        if self.triggered_at:
-            result['triggered_at'] = self.triggered_at.isoformat()
-        # 处理嵌套对象
-        result['option_info'] = self.option_info.to_dict()
-        return result
+        # 逐字段构建，避免asdict递归深拷贝；metadata按引用传出，序列化时只读
+        return {
+            'task_id': self.task_id,
+            'option_info': self.option_info.to_dict(),
+            'monitor_symbol': self.monitor_symbol,
+            'target_price': self.target_price,
+            'webhook_url': self.webhook_url,
+            'created_at': self.created_at_iso,
+            'expires_at': self.expires_at_iso,
+            'current_price': self.current_price,
+            'previous_price': self.previous_price,
+            'status': self.status,
+            'triggered_at': self.triggered_at_iso,
+            'strategy_id': self.strategy_id,
+            'level_id': self.level_id,
+            'monitor_type': self.monitor_type,
+            'metadata': self.metadata,
+            'monitor_instrument': self.monitor_instrument,
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'MonitorTask':
         """从字典创建监控任务"""
         # 处理datetime反序列化
-        data['created_at'] = datetime.fromisoformat(data['created_at'])
-        data['expires_at'] = datetime.fromisoformat(data['expires_at'])
+        _fi = datetime.fromisoformat
+        data['created_at'] = _fi(data['created_at'])
+        data['expires_at'] = _fi(data['expires_at'])
         if data.get('triggered_at'):
-            data['triggered_at'] = datetime.fromisoformat(data['triggered_at'])
+            data['triggered_at'] = _fi(data['triggered_at'])
         
-        # 处理嵌套对象
+        # 处理嵌套对象（按位置构造，省去关键字参数解包）
         option_data = data.pop('option_info')
-        data['option_info'] = OptionInfo(**option_data)
+        option_info = data['option_info'] = OptionInfo(
+            option_data['symbol'],
+            option_data['base_coin'],
+            option_data['strike_price'],
+            option_data['expiry_date'],
+            option_data['option_type'],
+        )
 
         # 兼容旧数据
         data.setdefault('monitor_instrument', 'option')
-        data.setdefault('monitor_symbol', data['option_info'].symbol)
+        data.setdefault('monitor_symbol', option_info.symbol)
 
+        # isoformat缓存不从原字符串预填（文件中的写法可能与isoformat不同），首次序列化时按解析值生成
         return cls(**data)
 
-@dataclass
+@dataclass(slots=True)
 class WebhookData:
     """Webhook发送数据"""
     task_id: str                    # 任务编号
@@ -86,16 +137,32 @@ class WebhookData:
     monitor_instrument: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'task_id': self.task_id,
+            'option_symbol': self.option_symbol,
+            'target_price': self.target_price,
+            'triggered_price': self.triggered_price,
+            'previous_price': self.previous_price,
+            'trigger_direction': self.trigger_direction,
+            'triggered_at': self.triggered_at,
+            'strategy_id': self.strategy_id,
+            'level_id': self.level_id,
+            'monitor_type': self.monitor_type,
+            'metadata': self.metadata,
+            'monitor_symbol': self.monitor_symbol,
+            'monitor_instrument': self.monitor_instrument,
+        }
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PriceUpdate:
-    """价格更新数据"""
+    """价格更新数据（每个行情tick创建一次，只读）"""
     symbol: str
     price: float
     timestamp: datetime
     
     def to_dict(self) -> Dict[str, Any]:
-        result = asdict(self)
-        result['timestamp'] = self.timestamp.isoformat()
-        return result
+        return {
+            'symbol': self.symbol,
+            'price': self.price,
+            'timestamp': self.timestamp.isoformat(),
+        }
@@ -456,11 +456,11 @@ def _snapshot_active_tasks(self) -> None:
                     "strategy_id": task.strategy_id,
                     "level_id": task.level_id,
                     "webhook_url": task.webhook_url,
-                    "created_at": task.created_at.isoformat(),
-                    "expires_at": task.expires_at.isoformat(),
+                    "created_at": task.created_at_iso,
+                    "expires_at": task.expires_at_iso,
                     "current_price": task.current_price,
                     "previous_price": task.previous_price,
-                    "triggered_at": task.triggered_at.isoformat() if task.triggered_at else None,
+                    "triggered_at": task.triggered_at_iso,
                 })
 
             payload = {
@@ -389,7 +389,8 @@ def _execute_level(self, task: ExecutionTask) -> Dict:
             raise RuntimeError("StrategyService not initialized with app")
 
         with self.app.app_context():
-            trader = current_app.config.get("STRATEGY_TRADER")
+            get_trader = current_app.config.get("STRATEGY_TRADER_FACTORY")
+            trader = get_trader() if get_trader else None
         if not trader:
             raise RuntimeError("Strategy trader not configured")
 
@@ -2,39 +2,100 @@
 
 from __future__ import annotations
 
-import json
+import atexit
+import os
+import tempfile
+import threading
+import time
 from pathlib import Path
 from threading import RLock
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import orjson
 
 
 WATCHLIST_FILE = Path("data/watchlist.json")
+# Debounce interval for background saves, in seconds.
+SAVE_INTERVAL = 0.5
 
 
 class WatchlistManager:
     def __init__(self) -> None:
         self._lock = RLock()
+        self._dirty = False
+        self._pending: Optional[List[Dict]] = None
+        self._writer: Optional[threading.Thread] = None
         WATCHLIST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        atexit.register(self.flush)
 
     def load(self) -> List[Dict]:
         with self._lock:
             if WATCHLIST_FILE.exists():
                 try:
-                    data = json.loads(WATCHLIST_FILE.read_text(encoding="utf-8"))
+                    data = orjson.loads(WATCHLIST_FILE.read_bytes())
                     if isinstance(data, list):
                         return data
-                except (json.JSONDecodeError, OSError):
+                except (orjson.JSONDecodeError, OSError):
                     return []
             return []
 
     def save(self, items: List[Dict]) -> None:
+        """Write items to disk immediately."""
+        with self._lock:
+            self._dirty = False
+            self._pending = None
+            self._write(items)
+
+    def mark_dirty(self, items: List[Dict]) -> None:
+        """Schedule items to be written by the background writer."""
         with self._lock:
-            WATCHLIST_FILE.write_text(json.dumps(items, indent=2, ensure_ascii=False), encoding="utf-8")
+            self._pending = items
+            self._dirty = True
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="watchlist-writer", daemon=True)
+                self._writer.start()
+
+    def flush(self) -> None:
+        """Write pending changes now, if any."""
+        with self._lock:
+            if self._dirty:
+                self._write(self._pending or [])
+                self._dirty = False
+                self._pending = None
 
     def clear(self) -> None:
         with self._lock:
+            self._dirty = False
+            self._pending = None
             if WATCHLIST_FILE.exists():
                 WATCHLIST_FILE.unlink()
 
+    def _run_writer(self) -> None:
+        while True:
+            time.sleep(SAVE_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                # Keep the writer alive; the dirty flag stays set so the next tick retries.
+                pass
+
+    @staticmethod
+    def _write(items: List[Dict]) -> None:
+        # Write to a temp file and rename so readers never see a partial file.
+        # Each write gets its own temp name so concurrent flushes cannot clobber each other.
+        fd, tmp_file = tempfile.mkstemp(
+            dir=WATCHLIST_FILE.parent, prefix=f"{WATCHLIST_FILE.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_file, WATCHLIST_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            raise
+
 
 watchlist_manager = WatchlistManager()
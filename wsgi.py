@@ -0,0 +1,18 @@
+"""
+WSGI 入口（生产环境）
+
+gunicorn -k gevent -w 1 wsgi:application
+
+必须单进程（-w 1）：关注列表、后台写盘线程、价格缓存和期权数据缓存都保存在进程内存中，
+多个worker会各自持有一份并互相覆盖 data/watchlist.json。并发由gevent协程提供（--threads 对gevent worker无效）。
+"""
+# 必须在导入 requests 等网络库之前打补丁，使对Bybit的出站请求变为协作式
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
+from app import app
+
+application = app